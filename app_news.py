@@ -3,6 +3,7 @@ import feedparser
 from datetime import datetime, timedelta
 import requests
 from bs4 import BeautifulSoup
+from keyword_matcher import compile_keywords
 
 # RSS feed URLs
 feed_urls = [
@@ -47,7 +48,7 @@ for url in feed_urls:
 
         # Filter by date range and keywords
         if start_date <= published_date <= today:
-            if any(keyword.lower() in (entry.title + entry.summary).lower() for keyword in keywords):
+            if compile_keywords(keywords).search(entry.title, entry.summary):
                 # Check if the title has already been seen
                 if entry.title in seen_titles:
                     continue  # Skip this article if the title is a duplicate
@@ -0,0 +1,106 @@
+import re
+from collections import namedtuple
+from urllib.parse import urlsplit
+from lxml import etree
+
+# Bytes fed to the parser at a time; extraction stops feeding once the article has ended
+CHUNK_SIZE = 16384
+# Elements whose text isn't part of the paragraph they sit in
+SKIPPED_TAGS = frozenset(["script", "style"])
+
+# How to read one site's articles: the paragraph tag, a matcher for the marker that ends the
+# article, one for paragraphs that are noise, and the length below which a paragraph is skipped
+Rules = namedtuple("Rules", "tag stop skip min_length")
+
+
+def compile_rules(stop_phrases, skip_phrases, tag="p", min_length=10):
+    """Rules matching any of the phrases with one compiled pattern each."""
+    def any_of(phrases):
+        return re.compile('|'.join(map(re.escape, phrases))) if phrases else None
+    return Rules(tag, any_of(stop_phrases), any_of(skip_phrases), min_length)
+
+
+DEFAULT_RULES = compile_rules(
+    stop_phrases=["Copyright", "All Rights Reserved"],
+    skip_phrases=["Advertisement", "Listen", "This copy is for", "www.djreprints.com"],
+)
+# Site (host without "www.") -> Rules; hosts that aren't registered get DEFAULT_RULES
+_rules = {}
+
+
+def register_rules(host, rules):
+    """Use rules for articles on host (and its subdomains); re-registering replaces them."""
+    _rules[host.lower().removeprefix("www.")] = rules
+
+
+def rules_for(url):
+    host = (urlsplit(url).hostname or "").removeprefix("www.")
+    while host:
+        if host in _rules:
+            return _rules[host]
+        host = host.partition(".")[2]
+    return DEFAULT_RULES
+
+
+def _text(element, parts):
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in SKIPPED_TAGS:
+            _text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def element_text(element):
+    """All text inside element, leaving out comments, scripts and styles."""
+    parts = []
+    _text(element, parts)
+    return ''.join(parts)
+
+
+def _chunks(document):
+    if isinstance(document, (str, bytes)):
+        return (document[i:i + CHUNK_SIZE] for i in range(0, len(document), CHUNK_SIZE))
+    # Not wrapped in a generator, so stopping early leaves the caller's iterator open to read on
+    return iter(document)
+
+
+def iter_paragraphs(document, rules=DEFAULT_RULES, encoding=None):
+    """Yield an article's paragraph texts in order, stopping at the end-of-article marker.
+
+    document is HTML as str or bytes, or an iterable of chunks such as a streamed
+    response's iter_content(). The page is parsed as it is fed; once a paragraph matches
+    rules.stop nothing more is read or parsed. Paragraphs matching rules.skip or shorter
+    than rules.min_length are left out.
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag=rules.tag, encoding=encoding)
+    chunks = _chunks(document)
+    done = False
+    while not done:
+        chunk = next(chunks, None)
+        if chunk is None:
+            try:
+                parser.close()
+            except etree.XMLSyntaxError:
+                # Nothing parseable was fed, e.g. an empty body: no paragraphs, as with BeautifulSoup
+                pass
+            done = True
+        else:
+            parser.feed(chunk)
+        for _, element in parser.read_events():
+            text = element_text(element).strip()
+            # Drop the paragraph's subtree, as nothing looks at it again
+            element.clear(keep_tail=True)
+            if rules.stop is not None and rules.stop.search(text):
+                return
+            if rules.skip is not None and rules.skip.search(text):
+                continue
+            if len(text) < rules.min_length:
+                continue
+            yield text
+
+
+def extract_paragraphs(document, url="", encoding=None):
+    """The article's paragraph texts, using the rules registered for url's site."""
+    return list(iter_paragraphs(document, rules_for(url), encoding))
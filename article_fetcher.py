@@ -0,0 +1,65 @@
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import requests
+from lxml import etree
+import article_extractor
+from http_pool import parallel_completed, pooled_session
+
+# Upper bound on simultaneous article downloads; a typical page of matching articles fits in one round
+MAX_WORKERS = 24
+# Seconds to wait for a single article before giving up on it
+DEFAULT_TIMEOUT = 15
+# Sessions kept open before the least recently used is closed
+MAX_SESSIONS = 32
+
+# One keep-alive session per host and credentials, so every article from a site reuses its
+# connections, and callers with other headers or cookies never get a session made with stale ones
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def session_for(url, headers=None, cookies=None):
+    """The pooled session for url's host with exactly these headers and cookies."""
+    key = (urlsplit(url).hostname or "", frozenset((headers or {}).items()), frozenset((cookies or {}).items()))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = pooled_session(MAX_WORKERS, headers, cookies)
+            if len(_sessions) > MAX_SESSIONS:
+                _sessions.popitem(last=False)[1].close()
+        _sessions.move_to_end(key)
+        return session
+
+
+def fetch_article(url, headers=None, cookies=None, timeout=DEFAULT_TIMEOUT):
+    """Download and extract one article's paragraphs. Never raises; failures are reported in 'error'."""
+    try:
+        with session_for(url, headers, cookies).get(url, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                return {'url': url, 'paragraphs': [], 'error': f"Status Code: {response.status_code}"}
+            # Without a declared charset the parser reads the page's meta tag instead of requests' latin-1 default
+            encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+            chunks = response.iter_content(article_extractor.CHUNK_SIZE)
+            paragraphs = list(article_extractor.iter_paragraphs(chunks, article_extractor.rules_for(url), encoding))
+            # Read the rest of the page unparsed, so the connection goes back to the pool instead of being dropped
+            for _ in chunks:
+                pass
+    except requests.RequestException as e:
+        logging.error(f"Error while fetching article {url}: {e}")
+        return {'url': url, 'paragraphs': [], 'error': str(e)}
+    except (etree.Error, ValueError, LookupError) as e:
+        # A body the parser can't read, or one declaring a charset lxml doesn't know
+        logging.error(f"Error while parsing article {url}: {e}")
+        return {'url': url, 'paragraphs': [], 'error': f"Unreadable page: {e}"}
+    return {'url': url, 'paragraphs': paragraphs, 'error': None}
+
+
+def prefetch_articles(urls, headers=None, cookies=None, timeout=DEFAULT_TIMEOUT):
+    """Fetch articles in parallel, yielding (index into urls, result) as each one completes.
+
+    At most MAX_WORKERS downloads run at once, so the whole batch takes about as long as
+    its slowest article rather than the sum of them.
+    """
+    yield from parallel_completed(lambda url: fetch_article(url, headers, cookies, timeout), urls, MAX_WORKERS)
@@ -0,0 +1,344 @@
+import calendar
+import json
+import logging
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+# Embedded article database shared by the Streamlit apps and ingestion scripts. The app only
+# sees what the worker ingests if both open this same file, so they must run on one host
+# (the Procfile starts both in the web process) or ARTICLE_DB must name a volume both mount.
+DB_PATH = os.environ.get("ARTICLE_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "database", "articles.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outlets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    outlet_id INTEGER NOT NULL REFERENCES outlets(id),
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT,
+    article_type TEXT,
+    published TEXT NOT NULL,
+    full_text TEXT,
+    fetched_at TEXT NOT NULL,
+    cluster_id INTEGER,
+    -- How a scraped article was retrieved, e.g. 'api', 'html' or 'browser'
+    fetched_via TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_link ON articles(link);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+CREATE INDEX IF NOT EXISTS idx_articles_outlet_published ON articles(outlet_id, published);
+
+CREATE TABLE IF NOT EXISTS stories (
+    id INTEGER PRIMARY KEY,
+    article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    rundown TEXT NOT NULL,
+    takeaway TEXT NOT NULL,
+    summary TEXT,
+    cluster_id INTEGER,
+    UNIQUE (article_id, position)
+);
+
+-- Newest article of a scraped outlet that every later sync can stop at
+CREATE TABLE IF NOT EXISTS sync_state (
+    outlet_id INTEGER PRIMARY KEY REFERENCES outlets(id),
+    published TEXT NOT NULL,
+    link TEXT NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _isoformat(dt):
+    """Format a datetime as the UTC ISO-8601 string the published index sorts on."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def connect(path=DB_PATH):
+    """Open the article database, creating the schema on first use."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the app read while an ingestion run is writing
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    return conn
+
+
+# Columns added after the first release, as (table, column, declaration)
+MIGRATIONS = [
+    ("stories", "summary", "TEXT"),
+    ("articles", "cluster_id", "INTEGER"),
+    ("stories", "cluster_id", "INTEGER"),
+    ("articles", "fetched_via", "TEXT"),
+]
+
+
+def _migrate(conn):
+    """Add columns introduced after a database was first created."""
+    for table, column, declaration in MIGRATIONS:
+        columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles(cluster_id)")
+
+
+def entry_to_article(entry):
+    """Convert a feedparser entry into the dict upsert_articles expects."""
+    published = None
+    if entry.get('published_parsed'):
+        published = _isoformat(datetime.fromtimestamp(calendar.timegm(entry.published_parsed), timezone.utc))
+    return {
+        'link': entry.link,
+        'title': entry.title,
+        'summary': entry.get('summary'),
+        'article_type': entry.get('wsj_articletype'),
+        'published': published,
+    }
+
+
+def _outlet_id(conn, outlet_name):
+    conn.execute("INSERT OR IGNORE INTO outlets (name) VALUES (?)", (outlet_name,))
+    return conn.execute("SELECT id FROM outlets WHERE name = ?", (outlet_name,)).fetchone()[0]
+
+
+def upsert_articles(conn, outlet_name, articles):
+    """Insert or refresh articles keyed by link. Returns their row ids in input order.
+
+    Articles without a publish date are dated when first seen. Fields missing from
+    a later update (e.g. full_text) keep their stored value.
+    """
+    ids = []
+    fetched_at = _now()
+    with conn:
+        outlet_id = _outlet_id(conn, outlet_name)
+        for article in articles:
+            conn.execute(
+                """
+                INSERT INTO articles (outlet_id, link, title, summary, article_type, published, full_text, fetched_at,
+                                      fetched_via)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    title = excluded.title,
+                    summary = COALESCE(excluded.summary, articles.summary),
+                    article_type = COALESCE(excluded.article_type, articles.article_type),
+                    full_text = COALESCE(excluded.full_text, articles.full_text),
+                    fetched_via = COALESCE(excluded.fetched_via, articles.fetched_via)
+                """,
+                (outlet_id, article['link'], article['title'], article.get('summary'),
+                 article.get('article_type'), article.get('published') or fetched_at,
+                 article.get('full_text'), fetched_at, article.get('fetched_via')),
+            )
+            ids.append(conn.execute("SELECT id FROM articles WHERE link = ?", (article['link'],)).fetchone()[0])
+    return ids
+
+
+def upsert_stories(conn, article_id, stories):
+    """Replace the story sections of an article with (title, rundown, takeaway) tuples.
+
+    A stored summary is kept only while the story text it was computed from is unchanged.
+    """
+    with conn:
+        for position, (title, rundown, takeaway) in enumerate(stories):
+            conn.execute(
+                """
+                INSERT INTO stories (article_id, position, title, rundown, takeaway)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(article_id, position) DO UPDATE SET
+                    title = excluded.title,
+                    summary = CASE WHEN stories.rundown = excluded.rundown AND stories.takeaway = excluded.takeaway
+                                   THEN stories.summary END,
+                    rundown = excluded.rundown,
+                    takeaway = excluded.takeaway
+                """,
+                (article_id, position, title, rundown, takeaway),
+            )
+        conn.execute("DELETE FROM stories WHERE article_id = ? AND position >= ?", (article_id, len(stories)))
+
+
+def outlet_links(conn, outlet_name):
+    """Links of every stored article of an outlet."""
+    return {row[0] for row in conn.execute(
+        "SELECT a.link FROM articles a JOIN outlets o ON o.id = a.outlet_id WHERE o.name = ?", (outlet_name,))}
+
+
+def sync_watermark(conn, outlet_name):
+    """Publish date of the newest article a sync of the outlet has fully processed, or None."""
+    row = conn.execute(
+        "SELECT s.published FROM sync_state s JOIN outlets o ON o.id = s.outlet_id WHERE o.name = ?",
+        (outlet_name,)).fetchone()
+    return row[0] if row else None
+
+
+def advance_watermark(conn, outlet_name, article_ids):
+    """Move the outlet's watermark to the newest of the given articles, never backwards."""
+    article_ids = list(article_ids)
+    if not article_ids:
+        return
+    with conn:
+        newest = conn.execute(
+            f"SELECT published, link FROM articles WHERE id IN ({','.join('?' * len(article_ids))}) "
+            "ORDER BY published DESC LIMIT 1", article_ids).fetchone()
+        conn.execute(
+            """
+            INSERT INTO sync_state (outlet_id, published, link) VALUES (?, ?, ?)
+            ON CONFLICT(outlet_id) DO UPDATE SET published = excluded.published, link = excluded.link
+            WHERE excluded.published > sync_state.published
+            """,
+            (_outlet_id(conn, outlet_name), newest['published'], newest['link']),
+        )
+
+
+def recent_articles(conn, outlet_name, days=7):
+    """Articles of an outlet published in the last `days` days, newest first."""
+    since = _isoformat(datetime.now(timezone.utc) - timedelta(days=days))
+    return conn.execute(
+        """
+        SELECT a.*, o.name AS outlet FROM articles a
+        JOIN outlets o ON o.id = a.outlet_id
+        WHERE o.name = ? AND a.published >= ?
+        ORDER BY a.published DESC
+        """,
+        (outlet_name, since),
+    ).fetchall()
+
+
+def outlet_stories(conn, outlet_name):
+    """Story sections of every stored issue of an outlet, newest issue first."""
+    return conn.execute(
+        """
+        SELECT s.*, a.title AS issue_title, a.link AS issue_link, a.published
+        FROM stories s
+        JOIN articles a ON a.id = s.article_id
+        JOIN outlets o ON o.id = a.outlet_id
+        WHERE o.name = ?
+        ORDER BY a.published DESC, s.position
+        """,
+        (outlet_name,),
+    ).fetchall()
+
+
+def stories_without_summary(conn, outlet_name):
+    """Stored story sections of an outlet that still need a summary."""
+    return conn.execute(
+        """
+        SELECT s.* FROM stories s
+        JOIN articles a ON a.id = s.article_id
+        JOIN outlets o ON o.id = a.outlet_id
+        WHERE o.name = ? AND s.summary IS NULL
+        """,
+        (outlet_name,),
+    ).fetchall()
+
+
+def set_story_summaries(conn, summaries):
+    """Save precomputed summaries given as (story_id, summary) pairs."""
+    with conn:
+        conn.executemany("UPDATE stories SET summary = ? WHERE id = ?",
+                         [(summary, story_id) for story_id, summary in summaries])
+
+
+def story_summary(conn, story_id):
+    row = conn.execute("SELECT summary FROM stories WHERE id = ?", (story_id,)).fetchone()
+    return row['summary'] if row else None
+
+
+def article_stories(conn, article_id):
+    return conn.execute("SELECT * FROM stories WHERE article_id = ? ORDER BY position", (article_id,)).fetchall()
+
+
+def set_article_clusters(conn, clusters):
+    """Save near-duplicate clusters as (article_id, representative_article_id) pairs."""
+    with conn:
+        conn.executemany("UPDATE articles SET cluster_id = ? WHERE id = ?",
+                         [(cluster_id, article_id) for article_id, cluster_id in clusters])
+
+
+def set_story_clusters(conn, clusters):
+    """Save near-duplicate clusters as (story_id, representative_story_id) pairs."""
+    with conn:
+        conn.executemany("UPDATE stories SET cluster_id = ? WHERE id = ?",
+                         [(cluster_id, story_id) for story_id, cluster_id in clusters])
+
+
+def cluster_seed(conn, days=7):
+    """Recent articles and all stories, oldest first, for rebuilding near-duplicate clusters."""
+    since = _isoformat(datetime.now(timezone.utc) - timedelta(days=days))
+    articles = conn.execute(
+        "SELECT id, title || ' ' || COALESCE(summary, '') AS text FROM articles WHERE published >= ? ORDER BY id",
+        (since,)).fetchall()
+    stories = conn.execute("SELECT id, rundown || ' ' || takeaway AS text FROM stories ORDER BY id").fetchall()
+    return articles, stories
+
+
+def related_outlets(conn, articles):
+    """Map each article id to the other outlets that reported the same story."""
+    cluster_ids = {article['cluster_id'] for article in articles if article['cluster_id'] is not None}
+    if not cluster_ids:
+        return {}
+    outlets = {}
+    for cluster_id, name in conn.execute(
+            f"""
+            SELECT DISTINCT a.cluster_id, o.name FROM articles a JOIN outlets o ON o.id = a.outlet_id
+            WHERE a.cluster_id IN ({','.join('?' * len(cluster_ids))})
+            """, list(cluster_ids)):
+        outlets.setdefault(cluster_id, set()).add(name)
+    return {article['id']: sorted(outlets.get(article['cluster_id'], set()) - {article['outlet']})
+            for article in articles}
+
+
+def import_rss_dump(conn, path, outlet_name):
+    """Load a feed saved by rss.ipynb's saveRSS (xmltodict JSON) into the store."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    items = data['rss']['channel'].get('item', [])
+    if isinstance(items, dict):
+        items = [items]
+
+    articles = []
+    for item in items:
+        published = None
+        if item.get('pubDate'):
+            try:
+                published = _isoformat(parsedate_to_datetime(item['pubDate']))
+            except (TypeError, ValueError):
+                logging.error(f"Unparseable pubDate {item['pubDate']!r} in {path}")
+        articles.append({
+            'link': item['link'],
+            'title': item['title'],
+            'summary': item.get('description'),
+            'published': published,
+        })
+    return upsert_articles(conn, outlet_name, articles)
+
+
+def main():
+    """Import legacy RSS dumps: python article_store.py <dump.json> <outlet name>"""
+    logging.basicConfig(level=logging.INFO)
+    path, outlet_name = sys.argv[1], sys.argv[2]
+
+    with closing(connect()) as conn:
+        ids = import_rss_dump(conn, path, outlet_name)
+    logging.info(f"Imported {len(ids)} articles from {path}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import sys
+import time
+import model_registry
+from bench_summary import load_stories
+from llm import BACKENDS, model_id, select_sentences, split_sentences
+
+
+def main():
+    """Compare summary encoder backends on the saved Fintech Radar stories: python bench_backends.py [csv]"""
+    articles = load_stories(*sys.argv[1:2])
+    sentence_lists = [split_sentences(article) for article in articles]
+    sentences = [sentence for article_sentences in sentence_lists for sentence in article_sentences]
+    print(f"{len(articles)} stories, {len(sentences)} sentences")
+
+    summaries, seconds = {}, {}
+    for backend in BACKENDS:
+        model = model_registry.get(model_id(backend))
+        # Warm up so neither side pays first-call overhead; encode directly to bypass the embedding cache
+        model.encode(sentences[:32], convert_to_numpy=True)
+        start = time.perf_counter()
+        embeddings = model.encode(sentences, convert_to_numpy=True)
+        seconds[backend] = time.perf_counter() - start
+        summaries[backend] = select_sentences(sentence_lists, embeddings)
+        print(f"{backend:5} {seconds[backend]:.2f}s ({len(sentences) / seconds[backend]:.1f} sentences/s)")
+
+    baseline = summaries["fp32"]
+    for backend in BACKENDS[1:]:
+        same = sum(a == b for a, b in zip(baseline, summaries[backend]))
+        print(f"{backend} speedup over fp32: {seconds['fp32'] / seconds[backend]:.1f}x")
+        print(f"{backend} summaries identical to fp32: {same}/{len(articles)} ({same / len(articles):.0%})")
+
+if __name__ == "__main__":
+    main()
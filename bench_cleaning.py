@@ -0,0 +1,95 @@
+import random
+import re
+import sys
+import time
+from bench_summary import load_issues
+from fintechradar import insert_story_titles
+from text_cleaning import clean_content, final_clean_content
+
+# Variants of each saved issue with the kind of noise raw scraped text has
+VARIANTS_PER_ISSUE = 25
+NOISE = ["’", "“", "”", "•", "🚀", "&", "$", "%", "(", ")", "_", "'", "\t", " ", "é", "#", "/"]
+BREAKS = ["\n", "\n\n", " \n", "\n ", "\n\n\n", "—\n", "-\n\n", " \n\n ", "\r\n"]
+MARKERS = ["The Rundown:", "Takeaway:", "Takeaway\n:", "Find Out More", "Show Some Love", ", "]
+
+
+def reference_clean_content(content):
+    """clean_content as it was before text_cleaning, one re.sub per rule."""
+    cleaned_content = re.sub(r'[^a-zA-Z0-9\s.,!?;:\-—]', '', content)
+    cleaned_content = re.sub(r'([—-])\n+', r'\1', cleaned_content)
+    cleaned_content = re.sub(r'(?<=\w)\n(?=\w)', ' ', cleaned_content)
+    cleaned_content = re.sub(r'(?<=[.,!?;])\n(?=\w)', ' ', cleaned_content)
+    cleaned_content = re.sub(r'(?<=\w)\n(?=[.,!?;])', '', cleaned_content)
+    cleaned_content = re.sub(r'\s*The Rundown:', r'\nThe Rundown:', cleaned_content)
+    cleaned_content = re.sub(r'\n{2,}', '\n', cleaned_content)
+    cleaned_content = re.sub(r'\s+(?=[.,!?;])', '', cleaned_content)
+    cleaned_content = re.sub(r'(?<=[.,!?;])\s+', ' ', cleaned_content)
+    cleaned_content = re.sub(r'\s*Takeaway:', r'\nTakeaway:', cleaned_content)
+    cleaned_content = re.sub(r'\s*Takeaway\n:', r'\nTakeaway:\n', cleaned_content)
+    return cleaned_content.strip()
+
+
+def reference_final_clean_content(content):
+    """final_clean_content as it was before text_cleaning."""
+    cleaned_content = re.sub(r'.*?\n([A-Z][^\n]+?, [^\n]+)\n', r'\1\n', content, 1, flags=re.DOTALL)
+    cleaned_content = re.sub(r'Show Some Love.*', '', cleaned_content, flags=re.DOTALL)
+    cleaned_content = re.sub(r'\n{2,}', '\n\n', cleaned_content)
+    return cleaned_content.strip()
+
+
+def noisy_variant(text, rng):
+    """Scatter noise characters, line breaks and section markers through text."""
+    pieces = re.split(r'(\s+)', text)
+    out = []
+    for piece in pieces:
+        roll = rng.random()
+        if piece.isspace():
+            out.append(rng.choice(BREAKS) if roll < 0.15 else piece)
+        elif roll < 0.05:
+            out.append(rng.choice(MARKERS))
+            out.append(piece)
+        elif roll < 0.15:
+            i = rng.randrange(len(piece) + 1)
+            out.append(piece[:i] + rng.choice(NOISE) + piece[i:])
+        else:
+            out.append(piece)
+    return ''.join(out)
+
+
+def build_corpus(issues, seed=0):
+    rng = random.Random(seed)
+    corpus = list(issues)
+    for issue in issues:
+        corpus.extend(noisy_variant(issue, rng) for _ in range(VARIANTS_PER_ISSUE))
+    return corpus
+
+
+def best_time(fn, corpus, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Check text_cleaning against the rule-by-rule implementation and time both: python bench_cleaning.py [csv]"""
+    corpus = build_corpus(load_issues(*sys.argv[1:2]))
+    finished = [insert_story_titles(reference_clean_content(text)) for text in corpus]
+    print(f"{len(corpus)} documents, {sum(map(len, corpus)) / 1e6:.1f}M characters")
+
+    for name, reference, fused, inputs in (
+            ("clean_content", reference_clean_content, clean_content, corpus),
+            ("final_clean_content", reference_final_clean_content, final_clean_content, finished)):
+        mismatches = sum(reference(text) != fused(text) for text in inputs)
+        assert mismatches == 0, f"{name}: {mismatches} documents differ from the reference"
+        reference_seconds = best_time(reference, inputs)
+        fused_seconds = best_time(fused, inputs)
+        print(f"{name}: identical on {len(inputs)} documents; "
+              f"{reference_seconds * 1000:.1f}ms -> {fused_seconds * 1000:.1f}ms "
+              f"({reference_seconds / fused_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import random
+import sys
+import time
+import model_registry
+import contract_qa
+
+# Roughly a page of contract text each
+WORDS_PER_PAGE = 450
+FILLER = ("the parties agree that each party shall perform its obligations under this agreement in good faith and "
+          "in accordance with applicable law including any schedules exhibits and amendments hereto as may be "
+          "agreed in writing from time to time by the authorized representatives of each party").split()
+# Clauses CUAD asks about, by clause name, to be placed deep inside the contract
+CLAUSES = {
+    "Governing Law": "This Agreement shall be governed by and construed in accordance with the laws of the State of Delaware.",
+    "Renewal Term": "Upon expiration of the Initial Term, this Agreement shall automatically renew for successive one-year terms.",
+    "Notice to Terminate Renewal": "Either party may prevent renewal by giving written notice at least ninety days before the end of the term.",
+    "Termination for Convenience": "Either party may terminate this Agreement for convenience upon thirty days prior written notice.",
+    "Anti-Assignment": "Neither party may assign this Agreement without the prior written consent of the other party.",
+    "Non-Compete": "During the Term, Supplier shall not compete with Distributor by selling competing products in the Territory.",
+    "Minimum Commitment": "Distributor shall purchase a minimum of ten thousand units during each calendar year.",
+    "IP Ownership Assignment": "All intellectual property created under this Agreement shall be owned exclusively by the Company.",
+}
+
+
+def synthetic_contract(pages=100, seed=0):
+    """A contract of filler paragraphs with the CUAD-style clauses scattered over its later pages."""
+    rng = random.Random(seed)
+    clause_pages = {}
+    for clause in CLAUSES.values():
+        clause_pages.setdefault(rng.randrange(pages // 3, pages), []).append(clause)
+    out = ["MASTER SUPPLY AGREEMENT between Acme Corporation and Globex Inc., dated January 1, 2024."]
+    for page in range(pages):
+        words = [rng.choice(FILLER) for _ in range(WORDS_PER_PAGE)]
+        paragraphs = [' '.join(words[i:i + 90]).capitalize() + '.' for i in range(0, len(words), 90)]
+        for clause in clause_pages.get(page, []):
+            paragraphs.insert(rng.randrange(len(paragraphs) + 1), clause)
+        out.append(f"Section {page + 1}.\n" + '\n'.join(paragraphs))
+    return '\n\n'.join(out)
+
+
+def use_local_model(path):
+    """Answer with the QA model saved at path instead of downloading the CUAD one."""
+    from transformers import AutoTokenizer, AutoModelForQuestionAnswering
+    model_registry._loaders[contract_qa.CUAD_MODEL] = lambda: (
+        AutoTokenizer.from_pretrained(path), AutoModelForQuestionAnswering.from_pretrained(path).eval())
+
+
+def main():
+    """Time windowed extraction of every CUAD clause from a 100-page contract: python bench_contract_qa.py [model dir]"""
+    if len(sys.argv) > 1:
+        use_local_model(sys.argv[1])
+    tokenizer, _ = model_registry.get(contract_qa.CUAD_MODEL)
+    text = synthetic_contract()
+    start = time.perf_counter()
+    contract = contract_qa.tokenize_contract(tokenizer, text)
+    tokenize_seconds = time.perf_counter() - start
+    question_ids = tokenizer(list(contract_qa.CUAD_QUESTIONS.values()), add_special_tokens=False)["input_ids"]
+    windows = contract_qa.contract_windows(len(contract.ids), contract_qa.window_size(tokenizer, question_ids))
+    pairs = len(windows) * len(question_ids)
+    print(f"{len(text.split())} words, {len(contract.ids)} tokens (tokenized in {tokenize_seconds:.2f}s), "
+          f"{len(windows)} windows, {pairs} question/window pairs")
+    print(f"truncation=True read {min(1, tokenizer.model_max_length / len(contract.ids)):.1%} of the contract")
+
+    start = time.perf_counter()
+    # Every window, without the retrieval pass (see bench_contract_retrieval.py for that)
+    answers = contract_qa.answer_questions(contract, contract_qa.CUAD_QUESTIONS)
+    seconds = time.perf_counter() - start
+    print(f"all {len(answers)} clauses in {seconds:.1f}s: {pairs / seconds:.1f} pairs/s, "
+          f"{len(contract.ids) * len(question_ids) / seconds:.0f} contract tokens/s over all questions")
+    for name, answer in answers.items():
+        print(f"  {name}: {answer[:100]!r}")
+
+if __name__ == "__main__":
+    main()
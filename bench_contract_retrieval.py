@@ -0,0 +1,65 @@
+import sys
+import time
+import model_registry
+import contract_qa
+from bench_contract_qa import CLAUSES, synthetic_contract, use_local_model
+
+# Passages read per clause to compare against reading every window
+K_VALUES = (1, 2, 4, 8)
+
+
+def planted_windows(contract, windows, clause):
+    """Windows that hold all of clause."""
+    at = contract.text.index(clause)
+    return {w for w, (start, end) in enumerate(windows)
+            if contract.offsets[start][0] <= at and at + len(clause) <= contract.offsets[end - 1][1]}
+
+
+def retrieval_recall(contracts, k_values=K_VALUES):
+    """Share of planted clauses with a window holding them among their question's top-k, for each k."""
+    tokenizer, _ = model_registry.get(contract_qa.CUAD_MODEL)
+    names = list(contract_qa.CUAD_QUESTIONS)
+    found = dict.fromkeys(k_values, 0)
+    question_ids = tokenizer(list(contract_qa.CUAD_QUESTIONS.values()), add_special_tokens=False)["input_ids"]
+    size = contract_qa.window_size(tokenizer, question_ids)
+    for contract in contracts:
+        windows = contract_qa.contract_windows(len(contract.ids), size)
+        for k in k_values:
+            pairs = set(contract_qa.retrieve_pairs(contract, contract_qa.CUAD_QUESTIONS, k))
+            for name, clause in CLAUSES.items():
+                q = names.index(name)
+                found[k] += any((q, w) in pairs for w in planted_windows(contract, windows, clause))
+    return {k: hits / (len(contracts) * len(CLAUSES)) for k, hits in found.items()}
+
+
+def main():
+    """Recall and speed of the BM25 pre-filter against the full scan: python bench_contract_retrieval.py [model dir] [contracts] [pages]"""
+    if len(sys.argv) > 1:
+        use_local_model(sys.argv[1])
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pages = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    tokenizer, _ = model_registry.get(contract_qa.CUAD_MODEL)
+    contracts = [contract_qa.tokenize_contract(tokenizer, synthetic_contract(pages, seed)) for seed in range(count)]
+
+    recall = retrieval_recall(contracts)
+    print(f"{count} contracts of {pages} pages, {len(CLAUSES)} planted clauses each")
+    for k, share in recall.items():
+        print(f"  top_k={k}: planted clause retrieved for {share:.1%}")
+
+    # The full scan's answers are the reference the pre-filtered ones are measured against
+    start = time.perf_counter()
+    full = [contract_qa.answer_questions(contract, contract_qa.CUAD_QUESTIONS) for contract in contracts]
+    full_seconds = time.perf_counter() - start
+    print(f"full scan: {full_seconds:.1f}s")
+    for k in K_VALUES:
+        start = time.perf_counter()
+        answers = [contract_qa.answer_questions(contract, contract_qa.CUAD_QUESTIONS,
+                                                contract_qa.retrieve_pairs(contract, contract_qa.CUAD_QUESTIONS, k))
+                   for contract in contracts]
+        seconds = time.perf_counter() - start
+        same = sum(a[name] == f[name] for a, f in zip(answers, full) for name in f)
+        print(f"  top_k={k}: {seconds:.1f}s ({full_seconds / seconds:.1f}x), "
+              f"same answer as the full scan for {same / (len(full) * len(contract_qa.CUAD_QUESTIONS)):.1%} of clauses")
+
+if __name__ == "__main__":
+    main()
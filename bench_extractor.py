@@ -0,0 +1,108 @@
+import glob
+import os
+import random
+import sys
+from bs4 import BeautifulSoup
+from article_extractor import extract_paragraphs, iter_paragraphs
+from bench_cleaning import best_time
+
+WORDS = ("payments bank fintech acquisition merger fund stablecoin regulator lender card wallet "
+         "investors startup revenue quarter growth deal analysts market shares billion").split()
+
+
+def reference_paragraphs(html):
+    """The full-content loop of master_with_bs4 before article_extractor."""
+    soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = soup.find_all('p')
+    content = []
+    stop_keywords = ["Copyright", "All Rights Reserved"]  # End signals
+    skip_phrases = ["Advertisement", "Listen", "This copy is for", "www.djreprints.com"]  # Skip noise
+
+    for paragraph in paragraphs:
+        text = paragraph.get_text().strip()
+        # Stop processing if we reach the "Copyright" section
+        if any(stop_word in text for stop_word in stop_keywords):
+            break
+
+        # Skip noisy or irrelevant paragraphs
+        if any(skip_phrase in text for skip_phrase in skip_phrases):
+            continue
+        if len(text) < 10:  # Skip very short paragraphs (like timestamps)
+            continue
+        content.append(text)
+    return content
+
+
+def sentence(rng, words=14):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def synthetic_page(rng):
+    """An article page shaped like a WSJ one: heavy head and nav, the body, then a long footer."""
+    head = ''.join(f'<script src="/bundle-{i}.js"></script><link rel="stylesheet" href="/s{i}.css">' for i in range(20))
+    nav = ''.join(f'<li><a href="/section/{i}">{rng.choice(WORDS)}</a></li>' for i in range(150))
+    body = []
+    for i in range(rng.randint(15, 40)):
+        roll = rng.random()
+        if roll < 0.1:
+            body.append('<p>Advertisement</p><div class="ad"><script>loadAd()</script></div>')
+        elif roll < 0.15:
+            body.append(f'<p><time>{rng.randint(1, 12)}:00 ET</time></p>')
+        elif roll < 0.2:
+            body.append('<p><button>Listen</button> to this article</p>')
+        else:
+            body.append(f'<p>{sentence(rng)} <a href="/x">{rng.choice(WORDS)} &amp; co</a> {sentence(rng)}'
+                        f'<!-- tracking --> <em>{sentence(rng, 6)}</em></p>')
+    footer = ''.join(f'<p>{sentence(rng)}</p><div><a href="/f{i}">{rng.choice(WORDS)}</a></div>' for i in range(300))
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>t</title>{head}</head><body>'
+            f'<nav><ul>{nav}</ul></nav><article>{"".join(body)}</article>'
+            f'<p>Copyright ©2024 Dow Jones &amp; Company, Inc. All Rights Reserved.</p>'
+            f'<p>This copy is for your personal, non-commercial use only.</p>'
+            f'<footer>{footer}</footer></body></html>')
+
+
+def load_pages(directory=None, count=100, seed=0):
+    """Saved article pages from directory (*.html), or synthetic ones without it."""
+    if directory:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+        return pages
+    rng = random.Random(seed)
+    return [synthetic_page(rng) for _ in range(count)]
+
+
+# Bodies a server may send instead of a page: empty, blank, cut off mid-paragraph, not HTML
+EDGE_CASES = ["", b"", "   ", b"<html><body><p>A paragraph cut off by a dropped connec",
+              b"<html><body><article><p>Kept paragraph one.</p><p>Cut paragraph th", b"\x00\x01 not html"]
+
+
+def check_edge_cases():
+    """article_extractor gives the same paragraphs as the BeautifulSoup loop on bodies that aren't whole pages."""
+    for document in EDGE_CASES:
+        html = document.decode("utf-8", "replace") if isinstance(document, bytes) else document
+        assert extract_paragraphs(document) == reference_paragraphs(html), document
+        assert list(iter_paragraphs([document])) == reference_paragraphs(html), document
+    # A streamed response with no body at all
+    assert list(iter_paragraphs(iter([]))) == []
+
+
+def main():
+    """Check article_extractor against the BeautifulSoup loop and time both: python bench_extractor.py [html dir]"""
+    check_edge_cases()
+    print(f"identical paragraphs on {len(EDGE_CASES)} empty and truncated bodies")
+    pages = load_pages(*sys.argv[1:2])
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f}M characters")
+
+    differ = [i for i, page in enumerate(pages) if extract_paragraphs(page) != reference_paragraphs(page)]
+    print(f"identical paragraphs on {len(pages) - len(differ)}/{len(pages)} pages"
+          + (f" (differ: {differ[:10]})" if differ else ""))
+    reference_seconds = best_time(reference_paragraphs, pages, repeat=3)
+    lxml_seconds = best_time(extract_paragraphs, pages, repeat=3)
+    print(f"BeautifulSoup html.parser: {reference_seconds * 1000 / len(pages):.2f}ms/page, "
+          f"article_extractor: {lxml_seconds * 1000 / len(pages):.2f}ms/page "
+          f"({reference_seconds / lxml_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import sys
+from bench_cleaning import best_time
+from bench_summary import load_issues
+from keyword_matcher import compile_keywords
+from news_config import keywords
+from text_cleaning import clean_content
+
+# (keywords, text, keywords expected to be found) the substring search got wrong or the matcher must keep
+CASES = [
+    (["AI"], "The company said it would expand", []),
+    (["ARM"], "No harm was done to customers", []),
+    (["AI"], "Banks are rolling out AI agents", ["AI"]),
+    (["IPO"], "IPOs surge as markets recover", ["IPO"]),
+    (["SPAC"], "SPACs are back in fashion", ["SPAC"]),
+    (["M&A"], "M&As rose in the quarter", ["M&A"]),
+    (["IPO"], "Shares of IPOX fell", []),
+    (["Intel"], "Intellectual property disputes", []),
+    (["merge"], "The merger closed on Friday", ["merge"]),
+    (["merger agreement", "merge"], "They signed a merger\n agreement", ["merger agreement", "merge"]),
+]
+
+
+def reference_search(keywords, *texts):
+    """The relevance check as it was before keyword_matcher."""
+    return any(keyword.lower() in text.lower() for keyword in keywords for text in texts if text)
+
+
+def main():
+    """Check keyword_matcher on known cases and time it against substring search: python bench_keywords.py [csv]"""
+    for case_keywords, text, expected in CASES:
+        assert compile_keywords(case_keywords).find(text) == expected, (case_keywords, text)
+    print(f"{len(CASES)} keyword cases match as expected")
+
+    corpus = [clean_content(text) for text in load_issues(*sys.argv[1:2])]
+    sentences = [sentence for text in corpus for sentence in text.split('. ')]
+    matcher = compile_keywords(keywords)
+    reference_seconds = best_time(lambda text: reference_search(keywords, text), sentences)
+    matcher_seconds = best_time(matcher.search, sentences)
+    print(f"{len(sentences)} sentences: substring search {reference_seconds * 1e6 / len(sentences):.1f}us, "
+          f"keyword_matcher {matcher_seconds * 1e6 / len(sentences):.1f}us "
+          f"({reference_seconds / matcher_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
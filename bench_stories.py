@@ -0,0 +1,151 @@
+import re
+import sys
+from bench_cleaning import best_time, build_corpus
+from bench_summary import load_issues
+from fintechradar import clean_issue, filter_stories, insert_story_titles
+from keyword_matcher import compile_keywords
+from story_parser import _walk, issue_stories, parse_article, parse_issue
+from text_cleaning import clean_content, final_clean_content
+
+
+def reference_extract_story_name_and_source(content):
+    """extract_story_name_and_source as it was before story_parser."""
+    story_titles = []
+    pattern_between_sections = r'Find Out More\s*(.*?)\s*The Rundown:'
+    matches_between_sections = re.findall(pattern_between_sections, content, re.DOTALL)
+
+    for section in matches_between_sections:
+        sentences = re.split(r'(?<=[.!?])\s+', section.strip())
+        for sentence in reversed(sentences):
+            if ',' in sentence:
+                story_titles.append(sentence.strip())
+                break
+
+    pattern_takeaway = r'Takeaway:\s*(.*?)\s*The Rundown:'
+    takeaway_sections = re.findall(pattern_takeaway, content, re.DOTALL)
+
+    for section in takeaway_sections:
+        sentences = re.split(r'(?<=[.!?])\s+', section.strip())
+        for sentence in reversed(sentences):
+            if ',' in sentence:
+                story_titles.append(sentence.strip())
+                break
+
+    for title in story_titles:
+        content = content.replace(title, '', 1)
+
+    return story_titles, content
+
+
+# (heading, rundown) openings of the story records clean_issue gives each saved issue, checked
+# by hand; issues without deal stories get none. Two issues list two headings before their
+# first rundown and the rest one story late, which pairing by order in the text absorbs.
+EXPECTED_PAIRS = [
+    [],
+    [
+        ('Banked Bolsters Australian Pay-b', 'Banked has acquired Australi'),
+        ('Plaid Introduces Pay-by-Bank for', 'Plaid has launched a pay-by-'),
+        ('Alipay sees overseas use of paym', 'Alipay has seen a threefold '),
+        ('Pockit to buy Monese, Finextra', 'Pockit, a UK fintech focused'),
+        ('HubSpot to Acquire B2B Billing M', 'HubSpot has announced its ac'),
+        ('Health insurtech startup Qantev ', 'Health insurtech startup Qan'),
+        ('Numeric grabs 28M Series A to au', 'Numeric, a startup focused o'),
+    ],
+    [],
+    [
+        ('Adyen to Include Klarna BNPL Off', 'Klarna is partnering with Ad'),
+        ('Bunq moves into stock trading, t', 'Bunq, the Amsterdam-based ch'),
+        ('PNC and Plaid ink data sharing a', 'PNC Financial Services Group'),
+        ('MercadoLibres fintech arm applie', 'Mercadolibres fintech arm, M'),
+        ('Digital debt collector worth 350', 'InDebted, the Australian dig'),
+        ('Health insurance startup Alan re', 'French health insurance star'),
+    ],
+    [
+        ('Download The 57-page PDF Now Wal', 'Walmart is partnering with F'),
+        ('Brex Launches Embedded Payments ', 'Last week, Brex announced it'),
+        ('Monzo brings monthly payments to', 'Monzo Flex customers with iO'),
+        ('JPMorgan could take over Goldman', 'JPMorgan Chase is in discuss'),
+        ('Fintech Giant Revolut Said to Be', 'According to reports, Revolu'),
+        ('Credit card fintech Yonder raise', 'Yonder, a UK-based credit ca'),
+        ('Orb founders grew so frustrated ', 'Last week, Orb announced it '),
+    ],
+    [],
+    [],
+    [
+        ('Buy now, pay later firm Klarna s', 'Klarna has reported a return'),
+        ('Banking Circle launches the firs', 'Banking Circle last week lau'),
+        ('Lynch-backed Featurespace in tal', 'Featurespace, a British frau'),
+        ('Digital bank Chime debuts advanc', 'Chime last week launched a n'),
+        ('CBA and BNY deliver near real-ti', 'Commonwealth Bank of Austral'),
+        ('Fast-growing immigrant-focused n', 'Comun, a digital bank aimed '),
+        ('Workpay Secures 5M Series A to B', 'Workpay, a cloud-based HR an'),
+    ],
+]
+
+def reference_filter_stories(content, keywords=["merger", "acquisition", "acquire", "m&a", "merge", "fund"]):
+    """filter_stories as it was before story_parser."""
+    story_titles, modified_content = reference_extract_story_name_and_source(content)
+    matcher = compile_keywords(keywords)
+    return [title for title in story_titles if matcher.search(title)]
+
+
+def reference_insert_story_titles(content):
+    """insert_story_titles as it was before story_parser."""
+    rundown_pattern = r'The Rundown:(.*?)(?=(Takeaway:|$))'
+    rundowns = re.findall(rundown_pattern, content, re.DOTALL)
+    story_titles, modified_content = reference_extract_story_name_and_source(content)
+
+    for i, (rundown, _) in enumerate(rundowns):
+        if i < len(story_titles):
+            title = story_titles[i]
+            modified_content = modified_content.replace(
+                f'The Rundown:{rundown}', f'\n{title}\n\nThe Rundown:{rundown}'
+            )
+    return modified_content
+
+
+def reference_stories(content):
+    """Deal filter, layout and stories of a cleaned issue the old way: three parses."""
+    reference_filter_stories(content)
+    return parse_article(final_clean_content(reference_insert_story_titles(content)))
+
+
+def record_stories(content):
+    """The same as clean_issue does it: one cached walk for the filter, the records and the layout."""
+    parse_issue.cache_clear()
+    issue_stories.cache_clear()
+    _walk.cache_clear()
+    filter_stories(content)
+    stories = issue_stories(content)
+    final_clean_content(insert_story_titles(content))
+    return stories
+
+
+def main():
+    """Check story_parser against the replace-based parsing and time both: python bench_stories.py [csv]"""
+    issues = [clean_content(text) for text in load_issues(*sys.argv[1:2])]
+    corpus = [clean_content(text) for text in build_corpus(load_issues(*sys.argv[1:2]))]
+    print(f"{len(issues)} saved issues, {len(corpus)} documents with noise")
+
+    # Saved issues must lay out byte for byte as before
+    for content in issues:
+        assert [story.heading for story in parse_issue(content)] == reference_extract_story_name_and_source(content)[0]
+        assert insert_story_titles(content) == reference_insert_story_titles(content)
+
+    # Noise can repeat a heading or rundown, where the old replace-all inserted headings more than once
+    differ = sum(insert_story_titles(content) != reference_insert_story_titles(content) for content in corpus)
+    print(f"layout: {len(corpus) - differ}/{len(corpus)} noisy documents identical to the replace-based layout")
+    if len(sys.argv) < 2:
+        # The records the worker stores, straight from clean_issue; parse_article on the laid-out text is off by one or two
+        pairs = [[(heading[:32], rundown[:28]) for heading, rundown, _ in clean_issue({'title': '', 'summary': text}, '')['stories']]
+                 for text in load_issues()]
+        assert pairs == EXPECTED_PAIRS, [(i, got) for i, (got, expected) in enumerate(zip(pairs, EXPECTED_PAIRS)) if got != expected]
+        print(f"stories: all {sum(map(len, pairs))} story records clean_issue gives the saved issues pair the expected heading and rundown")
+
+    reference_seconds = best_time(reference_stories, corpus)
+    record_seconds = best_time(record_stories, corpus)
+    print(f"filter + layout + stories: {reference_seconds * 1000:.1f}ms -> {record_seconds * 1000:.1f}ms "
+          f"({reference_seconds / record_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import csv
+import os
+import sys
+import tempfile
+import time
+import embedding_cache
+import summary_cache
+from fintechradar import parse_article
+from llm import compute_summaries, model_id, small_summary_batch
+
+
+def load_issues(path="fintech_radar_issues.csv"):
+    """Text of every saved Fintech Radar issue."""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row[0] for row in csv.reader(f) if row and len(row[0]) > 1]
+
+
+def load_stories(path="fintech_radar_issues.csv"):
+    """Rundown+takeaway texts of every story in the saved Fintech Radar issues."""
+    return [rundown+takeaway for issue in load_issues(path) for _, rundown, takeaway in parse_article(issue)]
+
+
+def fresh_embedding_cache():
+    """Point the summary model at an empty embedding cache, so timings include encoding."""
+    embedding_cache._caches[model_id()] = embedding_cache.EmbeddingCache(model_id(), directory=tempfile.mkdtemp())
+
+
+def fresh_summary_cache():
+    """Point the summary cache at an empty database, so the run neither reads nor fills the real one."""
+    summary_cache.DB_PATH = os.path.join(tempfile.mkdtemp(), "summaries.db")
+    summary_cache._local.conn = None
+
+
+def main():
+    """Compare summarizing one story at a time with one batched call, then a fully cached call."""
+    articles = load_stories(*sys.argv[1:2])
+    print(f"{len(articles)} stories")
+
+    # Warm up the model so neither side pays first-call overhead
+    compute_summaries(articles[:4])
+
+    fresh_embedding_cache()
+    start = time.perf_counter()
+    looped = [compute_summaries([article])[0] for article in articles]
+    loop_seconds = time.perf_counter() - start
+
+    fresh_embedding_cache()
+    start = time.perf_counter()
+    batched = compute_summaries(articles)
+    batch_seconds = time.perf_counter() - start
+
+    # Fill the summary cache, then time a page load that finds everything in it
+    fresh_summary_cache()
+    small_summary_batch(articles)
+    start = time.perf_counter()
+    small_summary_batch(articles)
+    cached_seconds = time.perf_counter() - start
+
+    same = sum(a == b for a, b in zip(looped, batched))
+    print(f"per-article loop: {loop_seconds:.2f}s ({len(articles) / loop_seconds:.1f} articles/s)")
+    print(f"batched:          {batch_seconds:.2f}s ({len(articles) / batch_seconds:.1f} articles/s)")
+    print(f"speedup:          {loop_seconds / batch_seconds:.1f}x")
+    print(f"summary cache:    {cached_seconds * 1000:.1f}ms")
+    print(f"identical summaries: {same}/{len(articles)}")
+
+if __name__ == "__main__":
+    main()
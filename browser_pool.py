@@ -0,0 +1,284 @@
+import atexit
+import itertools
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+from playwright.sync_api import Error, TimeoutError as PlaywrightTimeoutError, sync_playwright
+
+# Browsers kept running at once; each lives on its own worker thread, since sync Playwright
+# objects can only be used from the thread that created them.
+MAX_BROWSERS = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+# Pages served by a context before it is closed and recreated, dropping its accumulated memory
+MAX_CONTEXT_USES = 50
+# Pages served by a browser before the whole Chromium process is restarted
+MAX_BROWSER_USES = 500
+# Contexts (one per profile) a browser keeps open; the least recently used is closed beyond this
+MAX_CONTEXTS = 4
+LAUNCH_ARGS = ["--no-sandbox", "--disable-setuid-sandbox"]
+# Seconds a job may run before its future fails and its browser thread is replaced; covers
+# the longest waits a page job makes (a two-minute navigation plus a two-minute settle)
+JOB_TIMEOUT = 300
+# Seconds between the pool's checks for hung or dead browser threads
+WATCHDOG_INTERVAL = 5
+# Abandoned hung threads, each still holding its Chromium, past which the watchdog stops replacing
+# them; a hung thread that returns closes its browser and frees its slot
+MAX_HUNG_BROWSERS = 2
+# Seconds close() waits in all for the browser threads to finish their jobs and shut down
+CLOSE_TIMEOUT = 10
+
+# Resource types a page that is only read for its text never needs
+BLOCKED_RESOURCE_TYPES = frozenset(["image", "media", "font", "stylesheet", "manifest"])
+
+# Named context settings: keyword arguments for browser.new_context, plus optional cookies
+_profiles = {"default": {}}
+_install_lock = threading.Lock()
+_installed = False
+
+
+def register_profile(name, cookies=None, **context_options):
+    """Define the context settings jobs can ask for by name; re-registering replaces them."""
+    _profiles[name] = dict(context_options, cookies=cookies or [])
+
+
+def _install_chromium():
+    """Download Chromium once per process, the first time a launch finds it missing."""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            logging.info("Installing Chromium for Playwright...")
+            subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
+            _installed = True
+
+
+def block_resources(page, resource_types=BLOCKED_RESOURCE_TYPES):
+    """Abort the page's requests for the given resource types; everything else goes through."""
+    def handle(route):
+        if route.request.resource_type in resource_types:
+            route.abort()
+        else:
+            route.continue_()
+    page.route("**/*", handle)
+
+
+def wait_until_ready(page, selector, timeout=15000, idle_timeout=5000):
+    """Wait for selector to appear, then for the network to go idle, each for at most its timeout (ms).
+
+    Returns whether the selector appeared. A page that keeps polling never goes idle, so
+    running out of idle_timeout is not an error.
+    """
+    try:
+        page.wait_for_selector(selector, timeout=timeout)
+        ready = True
+    except PlaywrightTimeoutError:
+        ready = False
+    try:
+        page.wait_for_load_state("networkidle", timeout=idle_timeout)
+    except PlaywrightTimeoutError:
+        pass
+    return ready
+
+
+def _settle(future, result=None, error=None):
+    """Complete future unless it already is, which the watchdog does to a job that ran too long."""
+    try:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+class _Worker:
+    """One thread owning one Playwright instance, its browser and a context per profile."""
+
+    def __init__(self, jobs, name):
+        self._jobs = jobs
+        # (future, deadline) of the job being run, read by the pool's watchdog
+        self.running = None
+        # Set by the watchdog when it gives up on this thread; it exits after its current job,
+        # closing its browser
+        self.retired = False
+        self._playwright = None
+        self._browser = None
+        self._browser_uses = 0
+        # profile -> [context, uses], in least recently used order
+        self._contexts = {}
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _launch(self):
+        try:
+            return self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        except Error as e:
+            if "Executable doesn't exist" not in str(e):
+                raise
+            _install_chromium()
+            return self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+
+    def _close_browser(self):
+        for context, _ in self._contexts.values():
+            try:
+                context.close()
+            except Error:
+                pass
+        self._contexts = {}
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Error:
+                pass
+        self._browser = None
+        self._browser_uses = 0
+
+    def _context(self, profile):
+        if self._browser is None or not self._browser.is_connected() or self._browser_uses >= MAX_BROWSER_USES:
+            self._close_browser()
+            self._browser = self._launch()
+
+        entry = self._contexts.pop(profile, None)
+        if entry is not None and entry[1] >= MAX_CONTEXT_USES:
+            entry[0].close()
+            entry = None
+        if entry is None:
+            options = dict(_profiles[profile])
+            cookies = options.pop("cookies")
+            context = self._browser.new_context(**options)
+            if cookies:
+                context.add_cookies(cookies)
+            entry = [context, 0]
+        # Re-insert as most recently used, then close the stalest contexts over the cap
+        self._contexts[profile] = entry
+        while len(self._contexts) > MAX_CONTEXTS:
+            stale = next(iter(self._contexts))
+            self._contexts.pop(stale)[0].close()
+        entry[1] += 1
+        self._browser_uses += 1
+        return entry[0]
+
+    def _serve(self):
+        while not self.retired:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, fn, args, profile, timeout = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.running = (future, time.monotonic() + timeout if timeout is not None else float("inf"))
+            page = None
+            try:
+                page = self._context(profile).new_page()
+                _settle(future, result=fn(page, *args))
+            except BaseException as e:
+                _settle(future, error=e)
+            finally:
+                self.running = None
+                if page is not None:
+                    try:
+                        page.close()
+                    except Error:
+                        pass
+
+    def _run(self):
+        try:
+            with sync_playwright() as playwright:
+                self._playwright = playwright
+                self._serve()
+                self._close_browser()
+        except BaseException as e:
+            logging.error(f"Browser thread {self.thread.name} stopped: {e}")
+            if self._playwright is None:
+                # Playwright never started: fail the job this thread would have run, so its caller
+                # hears about it instead of waiting on a queue no thread can serve
+                job = self._jobs.get()
+                if job is not None and job[0].set_running_or_notify_cancel():
+                    _settle(job[0], error=e)
+
+
+class BrowserPool:
+    """Runs page jobs on a fixed set of long-lived browsers.
+
+    submit(fn, *args, profile=None, timeout=JOB_TIMEOUT) calls fn(page, *args) on a fresh
+    page of a warm context for the profile and returns a Future; the page is closed afterwards.
+    A job still running timeout seconds after it started fails with TimeoutError, and a
+    watchdog replaces the thread running it, or any thread that died, with a fresh one.
+    At most MAX_HUNG_BROWSERS hung threads are replaced; past that the pool runs short
+    until one of them returns.
+    """
+
+    def __init__(self, size=MAX_BROWSERS):
+        self._size = size
+        self._names = itertools.count()
+        self._jobs = queue.Queue()
+        self._workers = [self._spawn() for _ in range(size)]
+        # Hung threads the watchdog gave up on that may still have a browser running
+        self._hung = []
+        self._closed = threading.Event()
+        self._watchdog = threading.Thread(target=self._watch, name="browser-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def submit(self, fn, *args, profile=None, timeout=JOB_TIMEOUT):
+        profile = profile or "default"
+        if profile not in _profiles:
+            raise ValueError(f"Unknown browser profile {profile!r}")
+        future = Future()
+        self._jobs.put((future, fn, args, profile, timeout))
+        return future
+
+    def _spawn(self):
+        return _Worker(self._jobs, f"browser-{next(self._names)}")
+
+    def _watch(self):
+        while not self._closed.wait(WATCHDOG_INTERVAL):
+            # Hung threads whose jobs returned have closed their browsers and exited
+            self._hung = [worker for worker in self._hung if worker.thread.is_alive()]
+            for worker in self._workers + self._hung:
+                running = worker.running
+                if running is None or time.monotonic() <= running[1]:
+                    continue
+                _settle(running[0], error=TimeoutError(f"Browser job ran past its timeout on {worker.thread.name}"))
+                if not worker.retired:
+                    # A hung thread can't be stopped, only abandoned: it exits if its job ever returns
+                    worker.retired = True
+                    self._hung.append(worker)
+                    capped = " without a replacement" if len(self._hung) > MAX_HUNG_BROWSERS else ""
+                    logging.error(f"Abandoning hung browser thread {worker.thread.name}{capped}")
+            for worker in self._workers:
+                if not worker.thread.is_alive():
+                    worker.retired = True
+                    logging.error(f"Browser thread {worker.thread.name} died")
+            self._workers = [worker for worker in self._workers if not worker.retired]
+            # Top the pool back up, but never past MAX_HUNG_BROWSERS browsers beyond its size
+            room = self._size + MAX_HUNG_BROWSERS - len(self._hung)
+            self._workers.extend(self._spawn() for _ in range(min(self._size, room) - len(self._workers)))
+
+    def close(self):
+        """Stop the pool, waiting at most CLOSE_TIMEOUT seconds for its threads; hung ones are left behind."""
+        self._closed.set()
+        self._watchdog.join()
+        for _ in self._workers:
+            self._jobs.put(None)
+        deadline = time.monotonic() + CLOSE_TIMEOUT
+        for worker in self._workers:
+            worker.thread.join(max(0, deadline - time.monotonic()))
+            if worker.thread.is_alive():
+                logging.error(f"Browser thread {worker.thread.name} didn't stop within {CLOSE_TIMEOUT}s")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool, started on first use and shared by every caller."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,250 @@
+import functools
+import heapq
+import math
+import os
+from collections import Counter, namedtuple
+import model_registry
+from search_index import B, K1, tokenize
+
+CUAD_MODEL = "akdeniz27/roberta-large-cuad"
+# (question, contract) pairs per forward pass; lower it where memory is tight
+QA_BATCH_SIZE = int(os.environ.get("QA_BATCH_SIZE", "8"))
+# Tokens consecutive windows of a long contract share, so a clause cut by one window is whole in the next
+WINDOW_OVERLAP = 128
+# Longest answer span considered, in tokens; CUAD clauses run to several sentences
+MAX_ANSWER_TOKENS = 256
+# Windows per question the QA model reads after BM25 ranking; None reads every window
+TOP_K = int(os.environ.get("QA_TOP_K", "4")) or None
+
+# Clause name -> the question the CUAD model is asked for it
+CUAD_QUESTIONS = {
+    "Document Name": "What is the name of the contract?",
+    "Parties": "Who are the parties involved in the contract?",
+    "Agreement Date": "What is the date of the contract?",
+    "Effective Date": "On what date is the contract effective?",
+    "Expiration Date": "On what date will the contract expire?",
+    "Renewal Term": "What is the renewal term after the initial term expires?",
+    "Notice to Terminate Renewal": "What notice period is required to terminate renewal?",
+    "Governing Law": "Which state's law governs the interpretation of the contract?",
+    "Most Favored Nation": "Is there a most favored nation clause?",
+    "Non-Compete": "Is there a restriction on a party's ability to compete?",
+    "Exclusivity": "Is there an exclusivity obligation in the contract?",
+    "No-Solicit of Customers": "Is there a restriction on soliciting customers?",
+    "Competitive Restriction Exception": "Are there exceptions to non-compete or exclusivity?",
+    "No-Solicit of Employees": "Is there a restriction on hiring counterparty's employees?",
+    "Non-Disparagement": "Is there a non-disparagement clause?",
+    "Termination for Convenience": "Can the contract be terminated without cause?",
+    "ROFR/ROFO/ROFN": "Does the contract provide a right of first refusal or offer?",
+    "Change of Control": "Is there a clause for change of control events?",
+    "Anti-Assignment": "Does the contract require consent for assignment?",
+    "Revenue/Profit Sharing": "Is there a revenue-sharing clause?",
+    "Price Restriction": "Are there restrictions on price changes?",
+    "Minimum Commitment": "Is there a minimum purchase commitment?",
+    "Volume Restriction": "Is there a volume restriction clause?",
+    "IP Ownership Assignment": "Does one party own the intellectual property created?",
+    "Joint IP Ownership": "Is there a clause for joint IP ownership?",
+}
+
+
+def load_cuad():
+    # Imported here so the page renders before torch and transformers are loaded
+    from transformers import AutoTokenizer, AutoModelForQuestionAnswering
+    return AutoTokenizer.from_pretrained(CUAD_MODEL), AutoModelForQuestionAnswering.from_pretrained(CUAD_MODEL)
+
+# Load the CUAD model and tokenizer once per process
+model_registry.register(CUAD_MODEL, load_cuad)
+
+
+def pair_template(tokenizer):
+    """The special tokens the tokenizer puts around a (question, context) pair, as (before, between, after)."""
+    encoding = tokenizer("a", "b")
+    sequence_ids = encoding.sequence_ids(0)
+    question_at, context_at = sequence_ids.index(0), sequence_ids.index(1)
+    ids = encoding["input_ids"]
+    return ids[:question_at], ids[question_at + 1:context_at], ids[context_at + 1:]
+
+
+def pad(rows, pad_token_id):
+    """input_ids and attention_mask tensors for rows of token ids of different lengths."""
+    import torch
+    width = max(map(len, rows))
+    input_ids = torch.full((len(rows), width), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, row in enumerate(rows):
+        input_ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+        attention_mask[i, :len(row)] = 1
+    return input_ids, attention_mask
+
+
+# A tokenized contract: token ids and the (start, end) character offsets of each token in text
+Contract = namedtuple("Contract", "text ids offsets")
+
+
+def tokenize_contract(tokenizer, text):
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    return Contract(text, encoding["input_ids"], encoding["offset_mapping"])
+
+
+def contract_windows(length, size, overlap=WINDOW_OVERLAP):
+    """(start, end) token ranges of windows of size tokens covering length tokens, each overlapping the last."""
+    step = max(1, size - overlap)
+    windows = [(0, min(size, length))]
+    while windows[-1][1] < length:
+        start = windows[-1][0] + step
+        windows.append((start, min(start + size, length)))
+    return windows
+
+
+def window_size(tokenizer, question_ids):
+    """Contract tokens that fit in a window next to the longest question."""
+    before, between, after = pair_template(tokenizer)
+    return tokenizer.model_max_length - max(map(len, question_ids)) - len(before) - len(between) - len(after)
+
+
+@functools.lru_cache(maxsize=8)
+def _span_bias(width, max_answer_tokens):
+    """width x width additive mask: 0 where 0 <= end - start < max_answer_tokens, -inf elsewhere."""
+    import torch
+    positions = torch.arange(width)
+    length = positions[None, :] - positions[:, None]
+    return torch.zeros(width, width).masked_fill((length < 0) | (length >= max_answer_tokens), float("-inf"))
+
+
+def best_spans(start_logits, end_logits, context_mask, max_answer_tokens=MAX_ANSWER_TOKENS):
+    """Highest-scoring valid span of each row, as (scores, starts, ends, null_scores).
+
+    A span's score is start_logits[start] + end_logits[end]; it is valid when both ends are
+    context tokens and 0 <= end - start < max_answer_tokens. All spans of all rows are
+    scored at once as an outer sum, with invalid ones pushed to -inf. The null score is
+    that of the first token, which the model points at when the row has no answer.
+    """
+    width = start_logits.shape[1]
+    starts = start_logits.masked_fill(~context_mask, float("-inf"))
+    ends = end_logits.masked_fill(~context_mask, float("-inf"))
+    scores = starts[:, :, None] + ends[:, None, :] + _span_bias(width, max_answer_tokens)
+    best, flat = scores.flatten(1).max(dim=1)
+    return best, flat // width, flat % width, start_logits[:, 0] + end_logits[:, 0]
+
+
+def answer_questions(contract, questions, pairs=None, batch_size=QA_BATCH_SIZE, overlap=WINDOW_OVERLAP,
+                     max_answer_tokens=MAX_ANSWER_TOKENS):
+    """Answer every question about a tokenized contract, as {name: answer} for a {name: question} dict.
+
+    The contract is split into overlapping windows that each fit the model beside any of
+    the questions, and every (question, window) pair, or only the (question index,
+    window index) pairs given, runs through the model batch_size at a time. Each question's
+    answer is its best span over all of its windows, cut from the contract text; it is ""
+    when the model prefers no answer in some window over every span it found.
+    """
+    import torch
+    tokenizer, model = model_registry.get(CUAD_MODEL)
+    before, between, after = pair_template(tokenizer)
+    question_ids = tokenizer(list(questions.values()), add_special_tokens=False)["input_ids"]
+    windows = contract_windows(len(contract.ids), window_size(tokenizer, question_ids), overlap)
+    if pairs is None:
+        pairs = [(q, w) for q in range(len(question_ids)) for w in range(len(windows))]
+
+    # Per question: best (score, first token, last token) over its windows, and its lowest null score
+    best = [(float("-inf"), 0, -1)] * len(question_ids)
+    null = [float("inf")] * len(question_ids)
+    for i in range(0, len(pairs), batch_size):
+        batch = pairs[i:i + batch_size]
+        rows, context_at = [], []
+        for q, w in batch:
+            window_start, window_end = windows[w]
+            context_at.append(len(before) + len(question_ids[q]) + len(between))
+            rows.append(before + question_ids[q] + between + contract.ids[window_start:window_end] + after)
+        input_ids, attention_mask = pad(rows, tokenizer.pad_token_id)
+        context_mask = torch.zeros(input_ids.shape, dtype=torch.bool)
+        for row, ((_, w), at) in enumerate(zip(batch, context_at)):
+            context_mask[row, at:at + windows[w][1] - windows[w][0]] = True
+        with torch.inference_mode():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask)
+            scores, starts, ends, nulls = best_spans(outputs.start_logits, outputs.end_logits, context_mask,
+                                                     max_answer_tokens)
+        for (q, w), at, score, start, end, null_score in zip(
+                batch, context_at, scores.tolist(), starts.tolist(), ends.tolist(), nulls.tolist()):
+            null[q] = min(null[q], null_score)
+            if score > best[q][0]:
+                # Row positions back to contract token positions
+                shift = windows[w][0] - at
+                best[q] = (score, start + shift, end + shift)
+
+    answers = {}
+    for name, (score, first, last), null_score in zip(questions, best, null):
+        if last < first or null_score > score:
+            answers[name] = ""
+        else:
+            answers[name] = contract.text[contract.offsets[first][0]:contract.offsets[last][1]]
+    return answers
+
+
+def window_texts(contract, windows):
+    """The contract text each (start, end) token window covers."""
+    return [contract.text[contract.offsets[start][0]:contract.offsets[end - 1][1]] if end > start else ""
+            for start, end in windows]
+
+
+# Endings dropped from retrieval terms, longest first, so "governs", "governed" and "governing" all match
+SUFFIXES = ("'s", "ing", "ed", "es", "s")
+
+
+def stem(token):
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def terms(text):
+    return [stem(token) for token in tokenize(text)]
+
+
+def rank_windows(queries, texts):
+    """BM25 scores of every text for every query, as one list of scores per query."""
+    documents = [Counter(terms(text)) for text in texts]
+    lengths = [sum(document.values()) for document in documents]
+    avg_length = sum(lengths) / len(lengths) if lengths and sum(lengths) else 1
+    df = Counter(term for document in documents for term in document)
+    ranked = []
+    for query in queries:
+        query_terms = set(terms(query))
+        idf = {term: math.log(1 + (len(documents) - df[term] + 0.5) / (df[term] + 0.5)) for term in query_terms}
+        scores = []
+        for document, length in zip(documents, lengths):
+            norm = K1 * (1 - B + B * length / avg_length)
+            scores.append(sum(idf[term] * document[term] * (K1 + 1) / (document[term] + norm)
+                              for term in query_terms if term in document))
+        ranked.append(scores)
+    return ranked
+
+
+def retrieve_pairs(contract, questions, top_k=TOP_K):
+    """(question index, window index) pairs of the top_k windows for each question by BM25.
+
+    Questions are matched together with their clause names, which carry the words the
+    clauses themselves use (e.g. "Governing Law").
+    """
+    tokenizer, _ = model_registry.get(CUAD_MODEL)
+    question_ids = tokenizer(list(questions.values()), add_special_tokens=False)["input_ids"]
+    windows = contract_windows(len(contract.ids), window_size(tokenizer, question_ids))
+    ranked = rank_windows([f"{name} {question}" for name, question in questions.items()],
+                          window_texts(contract, windows))
+    return [(q, w) for q, scores in enumerate(ranked)
+            for w in sorted(heapq.nlargest(top_k, range(len(windows)), key=scores.__getitem__))]
+
+
+def extract_clauses(text, questions=CUAD_QUESTIONS, top_k=TOP_K, batch_size=QA_BATCH_SIZE):
+    """Answer every question about text, as {name: answer} for a {name: question} dict.
+
+    With top_k, the QA model only reads each question's top_k windows by BM25, a cheap
+    first pass; without it, every window of the contract.
+    """
+    tokenizer, _ = model_registry.get(CUAD_MODEL)
+    contract = tokenize_contract(tokenizer, text)
+    pairs = retrieve_pairs(contract, questions, top_k) if top_k else None
+    return answer_questions(contract, questions, pairs, batch_size=batch_size)
+
+
+def extract_relevant_clauses(text, question):
+    return extract_clauses(text, {question: question})[question]
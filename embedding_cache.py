@@ -0,0 +1,154 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import model_registry
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads are still serialized, other processes are not
+    fcntl = None
+
+# Content-addressed sentence embeddings, one pair of files per model:
+# <model>.f16 is a float16 row matrix and <model>.idx holds the embedding size followed by
+# the sha1 of each row's sentence.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "embeddings")
+# Embeddings kept in the in-memory LRU tier per model
+MEMORY_ITEMS = 20000
+DIGEST_SIZE = 20
+HEADER_SIZE = 4
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def sentence_digest(sentence):
+    return hashlib.sha1(sentence.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU, then memory-mapped disk) cache of one model's sentence embeddings.
+
+    The disk tier is append-only: rows are written before their digests, so a reader
+    never sees a digest whose row is missing, and other processes' appends are
+    picked up on the next miss.
+    """
+
+    def __init__(self, model_name, directory=CACHE_DIR, memory_items=MEMORY_ITEMS):
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        self._matrix_path = os.path.join(directory, safe_name + ".f16")
+        self._index_path = os.path.join(directory, safe_name + ".idx")
+        self._memory = OrderedDict()
+        self._memory_items = memory_items
+        self._rows = {}
+        self._index_bytes = 0
+        self._dim = None
+        self._matrix = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._refresh()
+
+    def _refresh(self):
+        """Pick up rows appended to the disk tier since we last looked."""
+        try:
+            with open(self._index_path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE:
+                    return
+                self._dim = int.from_bytes(header, "little")
+                f.seek(HEADER_SIZE + self._index_bytes)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        count = len(data) // DIGEST_SIZE
+        for i in range(count):
+            self._rows.setdefault(data[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE], self._index_bytes // DIGEST_SIZE + i)
+        self._index_bytes += count * DIGEST_SIZE
+
+    def _disk_row(self, row):
+        if self._matrix is None or row >= self._matrix.shape[0]:
+            self._matrix = np.memmap(self._matrix_path, dtype=np.float16, mode="r",
+                                     shape=(self._index_bytes // DIGEST_SIZE, self._dim))
+        return np.array(self._matrix[row])
+
+    def _remember(self, digest, embedding):
+        self._memory[digest] = embedding
+        self._memory.move_to_end(digest)
+        if len(self._memory) > self._memory_items:
+            self._memory.popitem(last=False)
+
+    def _append(self, digests, embeddings):
+        with open(self._index_path, "ab") as index_file:
+            if fcntl is not None:
+                fcntl.flock(index_file, fcntl.LOCK_EX)
+            try:
+                # Another process may have appended meanwhile; keep our row numbers in step
+                self._refresh()
+                new = [(d, e) for d, e in zip(digests, embeddings) if d not in self._rows]
+                if not new:
+                    return
+                if index_file.tell() == 0:
+                    index_file.write(self._dim.to_bytes(HEADER_SIZE, "little"))
+                # Write rows right after the last indexed one, dropping any left by an interrupted append
+                with open(self._matrix_path, "r+b" if os.path.exists(self._matrix_path) else "w+b") as matrix_file:
+                    matrix_file.seek(self._index_bytes // DIGEST_SIZE * self._dim * 2)
+                    matrix_file.write(np.stack([e for _, e in new]).astype(np.float16).tobytes())
+                    matrix_file.truncate()
+                index_file.write(b''.join(d for d, _ in new))
+                index_file.flush()
+                self._refresh()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(index_file, fcntl.LOCK_UN)
+
+    def encode(self, load_model, sentences):
+        """Embeddings for sentences, calling model.encode only for ones never seen before.
+
+        load_model is only called when something is missing, so fully cached calls never
+        touch the model. Returns float32 values rounded through float16, so cached and fresh results agree.
+        """
+        digests = [sentence_digest(sentence) for sentence in sentences]
+        found = {}
+        with self._lock:
+            for digest in digests:
+                if digest in found:
+                    continue
+                if digest in self._memory:
+                    self._memory.move_to_end(digest)
+                    found[digest] = self._memory[digest]
+                elif digest in self._rows:
+                    found[digest] = self._disk_row(self._rows[digest])
+                    self._remember(digest, found[digest])
+
+        missing = {}
+        for digest, sentence in zip(digests, sentences):
+            if digest not in found:
+                missing.setdefault(digest, sentence)
+        if missing:
+            embeddings = load_model().encode(list(missing.values()), convert_to_numpy=True).astype(np.float16)
+            with self._lock:
+                if self._dim is None:
+                    self._dim = embeddings.shape[1]
+                self._append(list(missing), embeddings)
+                for digest, embedding in zip(missing, embeddings):
+                    found[digest] = embedding
+                    self._remember(digest, embedding)
+
+        if not digests:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        return np.stack([found[digest] for digest in digests]).astype(np.float32)
+
+
+def get_cache(model_name):
+    """The process-wide cache for a model, created on first use."""
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name)
+        return _caches[model_name]
+
+
+def cached_encode(model_name, sentences):
+    """Embeddings from the cache, encoding misses with the registered model."""
+    return get_cache(model_name).encode(lambda: model_registry.get(model_name), sentences)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import feedparser
+
+# On-disk cache of raw feed documents and their HTTP validators
+FEED_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "feed_cache")
+
+# Parsed entries per URL, kept alongside the digest of the body they came from
+_parsed = {}
+_lock = threading.Lock()
+
+
+def _cache_paths(url):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(FEED_CACHE_DIR, key + ".json"), os.path.join(FEED_CACHE_DIR, key + ".xml")
+
+
+def _load_meta(url):
+    meta_path, _ = _cache_paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _parse(url, body, digest):
+    """Parse a feed body, reusing the previous parse when the body hasn't changed."""
+    with _lock:
+        cached = _parsed.get(url)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+
+    entries = feedparser.parse(body).entries
+    with _lock:
+        _parsed[url] = (digest, entries)
+    return entries
+
+
+def conditional_headers(url):
+    """Return If-None-Match/If-Modified-Since headers for a previously cached feed."""
+    meta = _load_meta(url)
+    if meta is None:
+        return {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def cached_entries(url):
+    """Entries for a feed the server answered with 304, or None if nothing is cached."""
+    meta = _load_meta(url)
+    if meta is None:
+        return None
+
+    with _lock:
+        cached = _parsed.get(url)
+    if cached is not None and cached[0] == meta["digest"]:
+        return cached[1]
+
+    _, body_path = _cache_paths(url)
+    try:
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except OSError:
+        return None
+    return _parse(url, body, meta["digest"])
+
+
+def store(url, response):
+    """Save a 200 response with its validators and return its parsed entries."""
+    body = response.content
+    digest = hashlib.sha1(body).hexdigest()
+    entries = _parse(url, body, digest)
+
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "digest": digest,
+    }
+    meta_path, body_path = _cache_paths(url)
+    try:
+        os.makedirs(FEED_CACHE_DIR, exist_ok=True)
+        # Write to temp files first so a concurrent reader never sees a half-written cache entry
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            f.write(body)
+        os.replace(body_path + suffix, body_path)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+    except OSError as e:
+        logging.error(f"Error while caching feed {url}: {e}")
+
+    return entries
@@ -0,0 +1,62 @@
+import logging
+import requests
+import feed_cache
+from http_pool import parallel_map, pooled_session
+
+# Upper bound on simultaneous feed downloads across all outlets
+MAX_WORKERS = 8
+# Seconds to wait for a single feed before giving up on it
+DEFAULT_TIMEOUT = 10
+
+# One pooled session so repeated fetches of the same host reuse connections
+session = pooled_session(MAX_WORKERS, hosts=MAX_WORKERS)
+
+
+def fetch_feed(url, headers, timeout=DEFAULT_TIMEOUT):
+    """Download and parse one feed. Never raises; failures are reported in 'error'.
+
+    Sends the cached validators so an unchanged feed costs a 304 and no parsing.
+    """
+    try:
+        response = session.get(url, headers={**headers, **feed_cache.conditional_headers(url)},
+                               timeout=timeout)
+        if response.status_code == 304:
+            entries = feed_cache.cached_entries(url)
+            if entries is not None:
+                return {'url': url, 'entries': entries, 'error': None}
+            # The cached body is gone, so ask again without validators
+            response = session.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        logging.error(f"Error while fetching feed {url}: {e}")
+        return {'url': url, 'entries': [], 'error': str(e)}
+
+    if response.status_code != 200:
+        return {'url': url, 'entries': [], 'error': f"Status Code: {response.status_code}"}
+
+    return {'url': url, 'entries': feed_cache.store(url, response), 'error': None}
+
+
+def fetch_feeds(feed_urls, headers, timeout=DEFAULT_TIMEOUT):
+    """Fetch all feeds of one outlet in parallel. Results keep the order of feed_urls."""
+    return parallel_map(lambda url: fetch_feed(url, headers, timeout), feed_urls, MAX_WORKERS)
+
+
+def prefetch_all(rss_feeds, headers_template, headers_referer, timeout=DEFAULT_TIMEOUT):
+    """Fetch every feed of every outlet at once.
+
+    Returns {outlet_name: [result, ...]} with the same result dicts as fetch_feeds.
+    Outlets without feeds (e.g. Fintech Radar) are skipped.
+    """
+    jobs = []
+    for outlet_name, feed_urls in rss_feeds.items():
+        if not feed_urls:
+            continue
+        headers = headers_template.copy()
+        headers['Referer'] = headers_referer.get(outlet_name, "")
+        jobs.extend((outlet_name, url, headers) for url in feed_urls)
+
+    results = {}
+    fetched = parallel_map(lambda job: fetch_feed(job[1], job[2], timeout), jobs, MAX_WORKERS)
+    for (outlet_name, _, _), result in zip(jobs, fetched):
+        results.setdefault(outlet_name, []).append(result)
+    return results
@@ -1,6 +1,10 @@
 import logging
-from playwright.sync_api import Playwright, sync_playwright, TimeoutError
-import re
+import requests
+import browser_pool
+import substack_fetcher
+from keyword_matcher import compile_keywords
+from story_parser import issue_stories, layout, parse_article, parse_issue
+from text_cleaning import clean_content, final_clean_content
 
 def scrape_issue_links(page):
     """Scrape all issue links from the homepage."""
@@ -21,11 +25,11 @@ def scrape_issue_links(page):
 
     return issue_links
 
-def scrape_issue_content(page):
+def scrape_issue_content(page, timeout=10000):
     """Extract content and metadata from an issue page."""
     try:
         # Wait for the content div to load
-        page.wait_for_selector('div.body.markup', timeout=10000)
+        page.wait_for_selector('div.body.markup', timeout=timeout)
 
         all_texts = page.locator('div.body.markup').all_inner_texts()
 
@@ -42,122 +46,198 @@ def scrape_issue_content(page):
         logging.error(f"Error while scraping issue content: {e}")
         return None
 
-def clean_content(content):
-    cleaned_content = re.sub(r'[^a-zA-Z0-9\s.,!?;:\-—]', '', content)
-    cleaned_content = re.sub(r'([—-])\n+', r'\1', cleaned_content)
-    cleaned_content = re.sub(r'(?<=\w)\n(?=\w)', ' ', cleaned_content)
-    cleaned_content = re.sub(r'(?<=[.,!?;])\n(?=\w)', ' ', cleaned_content)
-    cleaned_content = re.sub(r'(?<=\w)\n(?=[.,!?;])', '', cleaned_content)
-    cleaned_content = re.sub(r'\s*The Rundown:', r'\nThe Rundown:', cleaned_content)
-    cleaned_content = re.sub(r'\n{2,}', '\n', cleaned_content)
-    cleaned_content = re.sub(r'\s+(?=[.,!?;])', '', cleaned_content)
-    cleaned_content = re.sub(r'(?<=[.,!?;])\s+', ' ', cleaned_content)
-    cleaned_content = re.sub(r'\s*Takeaway:', r'\nTakeaway:', cleaned_content)
-    cleaned_content = re.sub(r'\s*Takeaway\n:', r'\nTakeaway:\n', cleaned_content)
-    return cleaned_content.strip()
-
-def extract_story_name_and_source(content):
-    story_titles = []
-    pattern_between_sections = r'Find Out More\s*(.*?)\s*The Rundown:'
-    matches_between_sections = re.findall(pattern_between_sections, content, re.DOTALL)
-
-    for section in matches_between_sections:
-        sentences = re.split(r'(?<=[.!?])\s+', section.strip())
-        for sentence in reversed(sentences):
-            if ',' in sentence:
-                story_titles.append(sentence.strip())
-                break
-
-    pattern_takeaway = r'Takeaway:\s*(.*?)\s*The Rundown:'
-    takeaway_sections = re.findall(pattern_takeaway, content, re.DOTALL)
-
-    for section in takeaway_sections:
-        sentences = re.split(r'(?<=[.!?])\s+', section.strip())
-        for sentence in reversed(sentences):
-            if ',' in sentence:
-                story_titles.append(sentence.strip())
-                break
+# Words in a story heading that make it a deal story
+DEAL_KEYWORDS = ["merger", "acquisition", "acquire", "m&a", "merge", "fund"]
 
-    for title in story_titles:
-        content = content.replace(title, '', 1)
-
-    return story_titles, content
-
-def filter_stories(content, keywords=["merger", "acquisition", "acquire", "m&a", "merge", "fund"]):
-    filtered_stories = []
-    story_titles, modified_content = extract_story_name_and_source(content)
-    for title in story_titles:
-        if any(keyword.lower() in title.lower() for keyword in keywords):
-            filtered_stories.append(title)
-
-    return filtered_stories
+def filter_stories(content, keywords=DEAL_KEYWORDS):
+    matcher = compile_keywords(keywords)
+    return [story.heading for story in parse_issue(content) if matcher.search(story.heading)]
 
 def insert_story_titles(content):
-    rundown_pattern = r'The Rundown:(.*?)(?=(Takeaway:|$))'
-    rundowns = re.findall(rundown_pattern, content, re.DOTALL)
-    story_titles, modified_content = extract_story_name_and_source(content)
-
-    for i, (rundown, _) in enumerate(rundowns):
-        if i < len(story_titles):
-            title = story_titles[i]
-            modified_content = modified_content.replace(
-                f'The Rundown:{rundown}', f'\n{title}\n\nThe Rundown:{rundown}'
-            )
-    return modified_content
+    return layout(content, parse_issue(content))
 
-def final_clean_content(content):
-    cleaned_content = re.sub(r'.*?\n([A-Z][^\n]+?, [^\n]+)\n', r'\1\n', content, 1, flags=re.DOTALL)
-    cleaned_content = re.sub(r'Show Some Love.*', '', cleaned_content, flags=re.DOTALL)
-    cleaned_content = re.sub(r'\n{2,}', '\n\n', cleaned_content)
-    return cleaned_content.strip()
 
+SUBSTACK_URL = "https://fintechradar.substack.com"
+ARCHIVE_URL = SUBSTACK_URL + "/archive?sort=new"
+# Issues each pooled browser loads side by side, one page apiece; the pool size bounds the rest
+PAGES_PER_BROWSER = 4
+# Seconds a pooled browser may spend per issue page (a navigation and a content wait of a minute each)
+ISSUE_PAGE_TIMEOUT = 150
+# Archive pages an incremental sync may walk back through before giving up on finding a known issue
+SYNC_MAX_PAGES = 20
 
 
-def fetch_fintech_radar_articles(playwright: Playwright):
-    """Main function to fetch and process articles."""
-    browser = playwright.chromium.launch(headless=True, args=["--no-sandbox", "--disable-setuid-sandbox"])
-    context = browser.new_context()
-    page = context.new_page()
-
+def load_issue_links(page):
     # Navigate to the Substack homepage or archive page
-    page.goto("https://fintechradar.substack.com/archive?sort=new", timeout=60000)
-
+    page.goto(ARCHIVE_URL, timeout=60000)
     # Scrape all issue links from the homepage
-    issue_links = scrape_issue_links(page)
-    all_issues_data = []
-
-    # Visit each issue link and extract content
-    for url in issue_links:
+    return scrape_issue_links(page)
+
+
+def clean_issue(issue_data, url):
+    """Cleaned issue; 'has_deals' says whether any of its stories are about deals.
+
+    Only issues with deal stories get their story titles laid out, and their
+    (subtitle, rundown, takeaway) stories listed under 'stories', each heading with
+    the rundown it introduces.
+    """
+    clean_text = clean_content(issue_data['summary'])
+    # filter_stories, the layout and the records share one walk of the cleaned issue (both parses are cached)
+    parsed = parse_issue(clean_text)
+    filtered_stories = filter_stories(clean_text)
+    stories = []
+    if filtered_stories:
+        # Paired on the text as the issue has it; the layout moves headings to where the old pairing put them
+        stories = list(issue_stories(clean_text))
+        clean_text = final_clean_content(layout(clean_text, parsed))
+    return {
+        **issue_data,
+        'title': issue_data['title'] if issue_data['title'] else 'No Title',
+        'summary': clean_text,
+        'link': url,
+        'has_deals': bool(filtered_stories),
+        'stories': stories,
+    }
+
+
+def scrape_issues(page, urls):
+    """Render several issues at once, one page each, returning the raw issue or None per url.
+
+    Every navigation is started before any is waited on, so the issues load in parallel;
+    a failure only loses its own issue.
+    """
+    pages = [page] + [page.context.new_page() for _ in urls[1:]]
+    try:
+        started = []
+        for issue_page, url in zip(pages, urls):
+            try:
+                logging.info(f"Visiting {url}...")
+                issue_page.goto(url, timeout=60000, wait_until="commit")
+                started.append(True)
+            except Exception as e:
+                logging.error(f"Failed to scrape {url}: {e}")
+                started.append(False)
+
+        results = []
+        for issue_page, url, ok in zip(pages, urls, started):
+            issue_data = scrape_issue_content(issue_page, timeout=60000) if ok else None
+            if issue_data is not None:
+                issue_data['link'] = url
+                issue_data['fetched_via'] = 'browser'
+            results.append(issue_data)
+        return results
+    finally:
+        for issue_page in pages[1:]:
+            issue_page.close()
+
+
+def render_issues(urls, pool=None, pages_per_browser=PAGES_PER_BROWSER):
+    """Scrape issues concurrently on pooled browsers, at most pool size * pages_per_browser at a time.
+
+    Returns the raw issue or None per url, in the order of urls.
+    """
+    if not urls:
+        return []
+    pool = pool or browser_pool.get_pool()
+    batches = [urls[i:i + pages_per_browser] for i in range(0, len(urls), pages_per_browser)]
+    futures = [pool.submit(scrape_issues, batch, timeout=len(batch) * ISSUE_PAGE_TIMEOUT) for batch in batches]
+    results = []
+    for batch, future in zip(batches, futures):
         try:
-            logging.info(f"Visiting {url}...")
-            page.goto(url, timeout=60000)
-            issue_data = scrape_issue_content(page)
-            clean_text = clean_content(issue_data['summary'])
-            filtered_stories = filter_stories(clean_text)
-            if filtered_stories:
-                modified_content = insert_story_titles(clean_text)
-                final_content = final_clean_content(modified_content)
-                issue_data = {
-                'title': issue_data['title'] if issue_data['title'] else 'No Title',
-                'summary': final_content,
-                'link': url
-            }
-                all_issues_data.append(issue_data)
+            results.extend(future.result())
         except Exception as e:
-            logging.error(f"Failed to scrape {url}: {e}")
+            logging.error(f"Failed to scrape issues {batch}: {e}")
+            results.extend([None] * len(batch))
+    return results
 
-    context.close()
-    browser.close()
 
-    return all_issues_data
+def archive_posts(known_links=frozenset(), since=None, max_pages=1, pool=None):
+    """Unknown archive posts newest first, stopping once the archive reaches known issues.
+
+    `since` is the watermark: every issue published at or before it has been processed.
+    Known posts newer than it are skipped rather than stopped at, so an issue that failed
+    in an earlier sync is still found behind newer ones. Without a watermark the walk goes
+    on for max_pages. If the archive endpoint can't be reached, falls back to the links on
+    the browser-rendered archive page, up to the first known one.
+    """
+    posts = []
+    try:
+        for page_number in range(max_pages):
+            page = substack_fetcher.archive_page(SUBSTACK_URL, offset=page_number * substack_fetcher.ARCHIVE_PAGE_SIZE)
+            for post in page:
+                published = post['published']
+                if since and published and published < since:
+                    return posts
+                if post['link'] in known_links:
+                    if since and published and published <= since:
+                        return posts
+                    continue
+                posts.append(post)
+            if len(page) < substack_fetcher.ARCHIVE_PAGE_SIZE:
+                break
+        return posts
+    except (requests.RequestException, ValueError, KeyError) as e:
+        logging.error(f"Error while loading the archive over HTTP, falling back to the browser: {e}")
+    pool = pool or browser_pool.get_pool()
+    links = pool.submit(load_issue_links).result()
+    known = [i for i, link in enumerate(links) if link in known_links]
+    return [{'link': link} for link in links[:known[0] if known else len(links)]]
+
+
+def fetch_issues(posts, pool=None, pages_per_browser=PAGES_PER_BROWSER):
+    """Fetch and clean posts, returning the cleaned issue or None per post, in order.
+
+    Issues come from Substack's JSON endpoints or server-rendered pages over HTTP; only
+    the ones HTTP can't serve are rendered in a pooled browser. Each issue's
+    'fetched_via' records which path served it: 'api', 'html' or 'browser', and
+    'archive_published' the date the archive listed it under, None for posts listed
+    by the browser fallback.
+    """
+    issues = substack_fetcher.fetch_posts(SUBSTACK_URL, posts)
+    missing = [post['link'] for post, issue in zip(posts, issues) if issue is None]
+    rendered = dict(zip(missing, render_issues(missing, pool, pages_per_browser)))
+
+    results = []
+    served = {}
+    for post, issue in zip(posts, issues):
+        issue = issue or rendered.get(post['link'])
+        if issue is not None:
+            issue = {**issue, 'published': issue.get('published') or post.get('published'),
+                     'archive_published': post.get('published')}
+            served[issue['fetched_via']] = served.get(issue['fetched_via'], 0) + 1
+            try:
+                issue = clean_issue(issue, post['link'])
+            except Exception as e:
+                logging.error(f"Failed to clean {post['link']}: {e}")
+                issue = None
+        results.append(issue)
+    logging.info(f"Fetched {len(posts)} issues ({served}).")
+    return results
+
+
+def fetch_fintech_radar_articles(pool=None, pages_per_browser=PAGES_PER_BROWSER):
+    """Main function to fetch and process the latest articles that have deal stories, in archive order."""
+    issues = fetch_issues(archive_posts(pool=pool), pool, pages_per_browser)
+    return [issue for issue in issues if issue is not None and issue['has_deals']]
+
+
+def sync_fintech_radar(known_links, since=None, pool=None, max_pages=SYNC_MAX_PAGES):
+    """Fetch only the issues that aren't stored yet.
+
+    Returns (issues, failed): every processed issue, with or without deal stories, and the
+    archive posts that couldn't be fetched, which bound how far the watermark may advance.
+    """
+    posts = archive_posts(known_links, since, max_pages, pool)
+    issues = fetch_issues(posts, pool)
+    return ([issue for issue in issues if issue is not None],
+            [post for post, issue in zip(posts, issues) if issue is None])
 
 def main():
     """Main entry point for running the script."""
     logging.basicConfig(level=logging.INFO)
 
-    with sync_playwright() as playwright:
-        articles = fetch_fintech_radar_articles(playwright)
-        logging.info(f"Fetched {len(articles)} articles.")
+    articles = fetch_fintech_radar_articles()
+    logging.info(f"Fetched {len(articles)} articles.")
 
 if __name__ == "__main__":
     main()
@@ -3,37 +3,34 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import re
 import time
-from playwright.sync_api import sync_playwright
+import browser_pool
 
 BASE_URL = "https://fintechradar.substack.com/archive?sort=new"
 
-# Set up Playwright with Chromium
-def scrape_substack():
+def load_post_links(page):
     links = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
-        # Open the Substack page
-        url = "https://fintechradar.substack.com"
-        page.goto(url)
-        time.sleep(5)  # Wait for the page to fully load
-
-        # Find all post links using their anchor tag structure
-        posts = page.locator('a[data-testid="post-preview-title"]')
-
-        if posts.count() == 0:
-            print("No posts found on the page.")
-        else:
-            print("Recent posts:")
-            for i in range(posts.count()):
-                link = posts.nth(i).get_attribute("href")
-                print(link)
-                links.append(link)
-
-        browser.close()
+    # Open the Substack page
+    url = "https://fintechradar.substack.com"
+    page.goto(url)
+    time.sleep(5)  # Wait for the page to fully load
+
+    # Find all post links using their anchor tag structure
+    posts = page.locator('a[data-testid="post-preview-title"]')
+
+    if posts.count() == 0:
+        print("No posts found on the page.")
+    else:
+        print("Recent posts:")
+        for i in range(posts.count()):
+            link = posts.nth(i).get_attribute("href")
+            print(link)
+            links.append(link)
     return links
 
+# Scrape with a Chromium from the shared browser pool
+def scrape_substack():
+    return browser_pool.get_pool().submit(load_post_links).result()
+
 def clean_content(content):
     cleaned_content = re.sub(r'[^a-zA-Z0-9\s.,!?;:\-—]', '', content)
     cleaned_content = re.sub(r'([—-])\n+', r'\1', cleaned_content)
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def pooled_session(max_connections, headers=None, cookies=None, hosts=1):
+    """A keep-alive session holding up to max_connections connections to each of `hosts` hosts."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=max_connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(headers or {})
+    session.cookies.update(cookies or {})
+    return session
+
+
+def parallel_map(fn, items, max_workers):
+    """fn over items on at most max_workers threads. Results keep the order of items."""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+def parallel_completed(fn, items, max_workers):
+    """Like parallel_map, but yield (index into items, result) as each one completes."""
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {executor.submit(fn, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
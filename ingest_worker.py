@@ -0,0 +1,188 @@
+import argparse
+import logging
+import threading
+from contextlib import closing
+import article_store
+from feed_fetcher import fetch_feeds, prefetch_all
+from fintechradar import sync_fintech_radar
+from keyword_matcher import compile_keywords
+from llm import small_summary_batch
+from near_duplicates import StoryClusterer, dedupe
+import search_index
+from news_config import rss_feeds, keywords_fintech, headers_referer, headers_template
+
+# Seconds between polls of each outlet; Fintech Radar is scraped with a browser, so less often
+POLL_INTERVALS = {
+    "WSJ": 15 * 60,
+    "BBC News": 15 * 60,
+    "FactSet": 60 * 60,
+    "Fintech Radar": 6 * 60 * 60,
+}
+DEFAULT_POLL_INTERVAL = 30 * 60
+
+# Near-duplicate clusters across outlets and issues, shared by the polling threads;
+# each remembers only its newest near_duplicates.MAX_ITEMS items
+article_clusters = StoryClusterer()
+story_clusters = StoryClusterer()
+
+
+def entry_text(entry):
+    return entry.title + ' ' + entry.get('summary', '')
+
+
+def merge_entries(outlet_name, results):
+    """Collect the entries of an outlet's feed results, dropping repeated and near-duplicate stories."""
+    unique_entries = {}
+    for result in results:
+        if result['error'] is not None:
+            logging.error(f"Failed to load articles from {outlet_name}. ({result['error']})")
+            continue
+        for entry in result['entries']:
+            if entry.title not in unique_entries:
+                unique_entries[entry.title] = entry
+    return dedupe(list(unique_entries.values()), entry_text)
+
+
+def store_entries(conn, outlet_name, entries):
+    ids = article_store.upsert_articles(conn, outlet_name, [article_store.entry_to_article(entry) for entry in entries])
+    article_store.set_article_clusters(
+        conn, [(article_id, article_clusters.add(article_id, entry_text(entry))) for article_id, entry in zip(ids, entries)])
+    logging.info(f"Stored {len(entries)} articles for {outlet_name}.")
+
+
+def ingest_feeds(conn, outlet_name, feed_urls):
+    """Fetch every feed of an outlet and upsert its entries."""
+    headers = headers_template.copy()
+    headers['Referer'] = headers_referer.get(outlet_name, "")
+    store_entries(conn, outlet_name, merge_entries(outlet_name, fetch_feeds(feed_urls, headers)))
+
+
+def summarize_stories(conn, outlet_name):
+    """Precompute summaries for stored stories that match the Fintech Radar keywords.
+
+    Near-duplicate stories share one summary, computed once for their cluster.
+    """
+    matcher = compile_keywords(keywords_fintech)
+    clusters = {}
+    for story in article_store.stories_without_summary(conn, outlet_name):
+        if matcher.search(story['rundown'], story['takeaway']):
+            clusters.setdefault(story['cluster_id'] or story['id'], []).append(story)
+
+    cluster_summaries = {cluster_id: article_store.story_summary(conn, cluster_id) for cluster_id in clusters}
+    # Summarize every cluster that still lacks one in a single batch
+    missing = [cluster_id for cluster_id, summary in cluster_summaries.items() if summary is None]
+    texts = [clusters[cluster_id][0]['rundown']+clusters[cluster_id][0]['takeaway'] for cluster_id in missing]
+    cluster_summaries.update(zip(missing, small_summary_batch(texts)))
+
+    summaries = [(story['id'], cluster_summaries[cluster_id])
+                 for cluster_id, stories in clusters.items() for story in stories]
+    article_store.set_story_summaries(conn, summaries)
+    logging.info(f"Summarized {len(clusters)} story clusters covering {len(summaries)} {outlet_name} stories.")
+
+
+def ingest_fintech_radar(conn, outlet_name="Fintech Radar"):
+    """Scrape new Fintech Radar issues, store their story sections and summarize them.
+
+    Only issues newer than the stored ones are fetched; every processed issue is stored,
+    so issues without deal stories aren't fetched again either.
+    """
+    issues, failed = sync_fintech_radar(article_store.outlet_links(conn, outlet_name),
+                                          article_store.sync_watermark(conn, outlet_name))
+    issue_ids = article_store.upsert_articles(
+        conn, outlet_name,
+        [{'link': issue['link'], 'title': issue['title'], 'full_text': issue['summary'],
+          'published': issue.get('published'), 'fetched_via': issue.get('fetched_via')} for issue in issues])
+    for issue_id, issue in zip(issue_ids, issues):
+        if not issue['has_deals']:
+            continue
+        article_store.upsert_stories(conn, issue_id, issue['stories'])
+        article_store.set_story_clusters(
+            conn, [(story['id'], story_clusters.add(story['id'], story['rundown'] + ' ' + story['takeaway']))
+                   for story in article_store.article_stories(conn, issue_id)])
+    # The watermark may only pass issues older than every failure, so the next sync walks back to retry them.
+    # Undated issues are stored under their fetch time, which would carry it to now, and a batch the browser
+    # fallback listed has no archive dates to order it by, so neither moves it.
+    if all(post.get('published') for post in failed) and all(issue['archive_published'] for issue in issues):
+        cutoff = min((post['published'] for post in failed), default=None)
+        article_store.advance_watermark(conn, outlet_name, [
+            issue_id for issue_id, issue in zip(issue_ids, issues)
+            if issue['published'] and (cutoff is None or issue['published'] < cutoff)])
+    logging.info(f"Stored {len(issues)} new {outlet_name} issues.")
+    summarize_stories(conn, outlet_name)
+
+
+def ingest_outlet(conn, outlet_name):
+    if rss_feeds[outlet_name] is None:
+        ingest_fintech_radar(conn, outlet_name)
+    else:
+        ingest_feeds(conn, outlet_name, rss_feeds[outlet_name])
+    logging.info(f"Indexed {search_index.index_pending(conn)} new or changed documents.")
+    # Changed documents leave tombstones that skew idf until compacted
+    search_index.compact_if_needed(conn)
+
+
+def poll_outlet(outlet_name, stop):
+    """Ingest one outlet on its own cadence until `stop` is set."""
+    interval = POLL_INTERVALS.get(outlet_name, DEFAULT_POLL_INTERVAL)
+    while not stop.is_set():
+        try:
+            with closing(article_store.connect()) as conn:
+                ingest_outlet(conn, outlet_name)
+        except Exception as e:
+            logging.error(f"Error while ingesting {outlet_name}: {e}")
+        stop.wait(interval)
+
+
+def seed_clusters(conn):
+    """Rebuild the in-memory clusters from what is already stored."""
+    articles, stories = article_store.cluster_seed(conn)
+    for article in articles:
+        article_clusters.add(article['id'], article['text'])
+    for story in stories:
+        story_clusters.add(story['id'], story['text'])
+
+
+def run_once():
+    """Ingest every outlet a single time, fetching all feeds at once."""
+    with closing(article_store.connect()) as conn:
+        for outlet_name, results in prefetch_all(rss_feeds, headers_template, headers_referer).items():
+            store_entries(conn, outlet_name, merge_entries(outlet_name, results))
+        for outlet_name, feed_urls in rss_feeds.items():
+            if feed_urls is None:
+                ingest_fintech_radar(conn, outlet_name)
+        logging.info(f"Indexed {search_index.index_pending(conn)} new or changed documents.")
+        search_index.compact_if_needed(conn)
+
+
+def main():
+    """Run the ingestion worker: python ingest_worker.py [--once]
+
+    It writes to article_store.DB_PATH, a local SQLite file, so it has to run on the same
+    host as the app reading it.
+    """
+    parser = argparse.ArgumentParser(description="Fetch, scrape and summarize news into the article store.")
+    parser.add_argument("--once", action="store_true", help="ingest every outlet once and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(message)s")
+
+    with closing(article_store.connect()) as conn:
+        seed_clusters(conn)
+
+    if args.once:
+        run_once()
+        return
+
+    # One thread per outlet so a slow Fintech Radar scrape never delays the RSS polls
+    stop = threading.Event()
+    threads = [threading.Thread(target=poll_outlet, args=(outlet_name, stop), name=outlet_name, daemon=True)
+               for outlet_name in rss_feeds]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            stop.wait(1)
+    except KeyboardInterrupt:
+        stop.set()
+
+if __name__ == "__main__":
+    main()
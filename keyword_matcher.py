@@ -0,0 +1,95 @@
+import re
+from functools import lru_cache
+
+
+# How a keyword may end, from least to most strict: anywhere, as a token or its plural, as a token
+STEM, PLURAL, TOKEN = '', r'(?=s?(?!\w))', r'(?!\w)'
+
+
+def _ending(keyword):
+    """Acronyms, proper nouns and symbols (AI, ARM, M&A, Intel) only match as whole tokens.
+
+    Acronyms also match with a plural "s" ("IPOs", "SPACs"), left out of the match.
+    Lowercase keywords are stems and also match longer words ("merge" hits "merger").
+    """
+    if keyword.isupper():
+        return PLURAL
+    if keyword[0].isupper() or not keyword.replace(' ', '').isalpha():
+        return TOKEN
+    return STEM
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def _trie_pattern(keywords):
+    """Compile keywords into one regex shaped like a trie of their characters.
+
+    Shared prefixes are tested once, so a scan costs about one character-class check
+    per position no matter how many keywords there are.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in _normalize(keyword):
+            node = node.setdefault(ch, {})
+        # The '' key marks the end of a keyword; its value is the least strict ending of those ending here
+        node[''] = min(node.get('', TOKEN), _ending(keyword), key=(STEM, PLURAL, TOKEN).index)
+
+    def build(node):
+        alternatives = []
+        for ch in sorted(key for key in node if key != ''):
+            # Multi-word keywords tolerate any run of whitespace between words
+            alternatives.append((r'\s+' if ch == ' ' else re.escape(ch)) + build(node[ch]))
+        # Ending here is tried last, so longer keywords win
+        if '' in node:
+            alternatives.append(node[''])
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    return re.compile(r'(?<!\w)' + build(trie))
+
+
+class KeywordMatcher:
+    """Finds which of a fixed list of keywords occur in text with one regex scan per text.
+
+    Every keyword must start on a token boundary, so "AI" no longer hits "said" and
+    "ARM" no longer hits "harm". Matching is case-insensitive.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._pattern = _trie_pattern(self.keywords)
+
+        # A match of a long keyword also counts for the shorter keywords inside it
+        single = {keyword: _trie_pattern([keyword]) for keyword in self.keywords}
+        self._implied = {}
+        for keyword in self.keywords:
+            implied = {other for other, pattern in single.items() if pattern.search(_normalize(keyword))}
+            self._implied.setdefault(_normalize(keyword), set()).update(implied)
+
+    def search(self, *texts):
+        """True if any keyword occurs in any of the texts."""
+        return any(text and self._pattern.search(text.lower()) for text in texts)
+
+    def find(self, *texts):
+        """Keywords occurring in any of the texts, in the order they were given."""
+        hits = set()
+        for text in texts:
+            if not text:
+                continue
+            for match in self._pattern.finditer(text.lower()):
+                hits |= self._implied[_normalize(match.group())]
+        return [keyword for keyword in self.keywords if keyword in hits]
+
+
+@lru_cache(maxsize=32)
+def _compile(keywords):
+    return KeywordMatcher(keywords)
+
+
+def compile_keywords(keywords):
+    """Return a KeywordMatcher for a keyword list, compiled once per process."""
+    return _compile(tuple(keywords))
@@ -1,8 +1,15 @@
-import transformers
-import torch
-import gc
-from sentence_transformers import SentenceTransformer, util
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import functools
+import os
+import re
+import numpy as np
+from embedding_cache import cached_encode
+import model_registry
+import summary_cache
+
+# import transformers
+# import torch
+# import gc
+# from transformers import AutoModelForCausalLM, AutoTokenizer
 
 # model_id = "mistralai/Mistral-7B-Instruct-v0.3"
 
@@ -53,34 +60,98 @@ from transformers import AutoModelForCausalLM, AutoTokenizer
 #     return response
 
 
-# Load the model (MiniLM)
-model = SentenceTransformer('all-mpnet-base-v2')
+MODEL_NAME = 'all-mpnet-base-v2'
+# "fp32" runs the model as published; "int8" quantizes its linear layers for faster CPU inference;
+# "onnx" runs an int8 export of it in ONNX Runtime, the fastest on CPU (see bench_backends.py)
+BACKENDS = ("fp32", "int8", "onnx")
+SUMMARY_BACKEND = os.environ.get("SUMMARY_BACKEND", "fp32")
+if SUMMARY_BACKEND not in BACKENDS:
+    raise ValueError(f"SUMMARY_BACKEND must be one of {BACKENDS}, not {SUMMARY_BACKEND!r}")
 
-import re
-from sentence_transformers import util
 
-def small_summary(article, top_n=2):
-    # Use regex to split sentences more accurately
-    sentences = re.split(r'(?<=[.!?])\s+', article.strip())
+def model_id(backend=SUMMARY_BACKEND):
+    """Registry and embedding cache key of a backend, so backends never share embeddings."""
+    return MODEL_NAME if backend == "fp32" else f"{MODEL_NAME}-{backend}"
 
-    # Encode all sentences into embeddings
-    sentence_embeddings = model.encode(sentences, convert_to_tensor=True)
 
-    # Calculate the mean embedding (to represent the entire article)
-    article_embedding = sentence_embeddings.mean(dim=0)
+def load_model(backend="fp32"):
+    # Imported here so importing llm doesn't pull in torch
+    from sentence_transformers import SentenceTransformer
+    if backend == "int8":
+        import torch
+        # Dynamic quantization only runs on CPU
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        from onnx_encoder import OnnxEncoder
+        return OnnxEncoder(MODEL_NAME)
+    return SentenceTransformer(MODEL_NAME)
 
-    # Use cosine similarity to rank sentences based on relevance to the whole article
-    similarities = util.pytorch_cos_sim(article_embedding, sentence_embeddings)[0]
+for backend in BACKENDS:
+    model_registry.register(model_id(backend), functools.partial(load_model, backend))
 
-    # Ensure top_n does not exceed the number of available sentences
-    top_n = min(top_n, len(sentences))
 
-    # Get the top N sentences with the highest similarity scores
-    top_sentence_indices = similarities.topk(top_n).indices
-
-    # Sort the selected sentences by their original order in the article
-    top_sentences = [sentences[i] for i in sorted(top_sentence_indices)]
-
-    # Join the sentences to form the summary
-    summary = ' '.join(top_sentences)
-    return summary
\ No newline at end of file
+def split_sentences(article):
+    # Use regex to split sentences more accurately
+    return re.split(r'(?<=[.!?])\s+', article.strip())
+
+
+def small_summary(article, top_n=2, backend=SUMMARY_BACKEND):
+    return small_summary_batch([article], top_n, backend)[0]
+
+
+def small_summary_batch(articles, top_n=2, backend=SUMMARY_BACKEND):
+    """Summarize many articles, reusing summaries already computed by any session or process."""
+    if not articles:
+        return []
+    keys = [summary_cache.summary_key(article, top_n, model_id(backend)) for article in articles]
+    summaries = summary_cache.get_many(keys)
+    missing = {key: article for key, article in zip(keys, articles) if key not in summaries}
+    if missing:
+        computed = dict(zip(missing, compute_summaries(list(missing.values()), top_n, backend)))
+        summary_cache.put_many(computed)
+        summaries.update(computed)
+    return [summaries[key] for key in keys]
+
+
+def compute_summaries(articles, top_n=2, backend=SUMMARY_BACKEND):
+    """Summarize many articles with a single batched model.encode call.
+
+    Picks, per article, the top_n sentences closest to the article's mean embedding,
+    exactly like small_summary, but the per-article work is vectorized over
+    segment offsets into one sentence matrix.
+    """
+    if not articles:
+        return []
+    sentence_lists = [split_sentences(article) for article in articles]
+    sentences = [sentence for article_sentences in sentence_lists for sentence in article_sentences]
+    # Encode every sentence of every article in one batch, skipping ones already cached
+    return select_sentences(sentence_lists, cached_encode(model_id(backend), sentences), top_n)
+
+
+def select_sentences(sentence_lists, sentence_embeddings, top_n=2):
+    """Join the top_n sentences of each article, given the embeddings of all their sentences in order."""
+    # Article i owns rows offsets[i]:offsets[i + 1] of the embedding matrix
+    counts = np.array([len(article_sentences) for article_sentences in sentence_lists])
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    owner = np.repeat(np.arange(len(sentence_lists)), counts)
+
+    # Calculate the mean embedding of each article (to represent the entire article)
+    article_embeddings = np.add.reduceat(sentence_embeddings, offsets[:-1], axis=0) / counts[:, None]
+
+    # Cosine similarity of each sentence to the mean of its own article
+    similarities = np.einsum('ij,ij->i', sentence_embeddings, article_embeddings[owner])
+    similarities /= np.linalg.norm(sentence_embeddings, axis=1) * np.linalg.norm(article_embeddings, axis=1)[owner] + 1e-12
+
+    # Lay the scores out one article per row, padded with -inf, and rank each row at once
+    ranked = np.full((len(sentence_lists), counts.max()), -np.inf)
+    ranked[owner, np.arange(len(owner)) - offsets[owner]] = similarities
+    top_indices = np.argsort(-ranked, axis=1, kind='stable')[:, :top_n]
+
+    summaries = []
+    for article_sentences, indices in zip(sentence_lists, top_indices):
+        # Ensure top_n does not exceed the number of available sentences
+        indices = indices[:min(top_n, len(article_sentences))]
+        # Sort the selected sentences by their original order in the article
+        summaries.append(' '.join(article_sentences[i] for i in sorted(indices)))
+    return summaries
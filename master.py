@@ -1,74 +1,15 @@
 # app.py
 import streamlit as st
-import feedparser
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from fintechradar import fetch_fintech_radar_articles
-from llm import small_summary
-import requests
-import re 
-from playwright.sync_api import Playwright, sync_playwright, TimeoutError
-import os
-
-
-os.system("playwright install chromium")
-
-# RSS Feeds for Different Outlets
-rss_feeds = {
-    "WSJ": [
-        "https://feeds.a.dj.com/rss/RSSMarketsMain.xml",
-        "https://feeds.a.dj.com/rss/WSJcomUSBusiness.xml",
-    ],
-    "BBC News": ["http://feeds.bbci.co.uk/news/rss.xml?edition=us"],
-    "FactSet": ["https://investor.factset.com/rss/news-releases.xml",
-                "https://investor.factset.com/rss/sec-filings.xml",
-                # "https://investor.factset.com/rss/events.xml"
-                ],
-}
-
-# Add Fintech Radar as a new option
-rss_feeds["Fintech Radar"] = None  # No RSS; handled differently
-
-# Keywords to filter articles
-keywords = [
-    "merge", "M&A", "acquisition", "takeover", "joint venture", 
-    "divestiture", "merger agreement", "IPO", "public offering", 
-    "capital raise", "supply chain", "manufacturing", 
-    "distribution", "operations", 
-    "finance", "funding", "investment", "private equity", 
-    "venture capital", "debt", "interest rates", "inflation", 
-    "monetary policy", "bank", "central bank", "credit", 
-    "lending",  "technology", "artificial intelligence", 
-    "AI", "cloud computing", "blockchain", 
-    "fintech", "semiconductor", "chip", "processor", "microchip", 
-    "Nvidia", "TSMC", "Intel", "ARM",
-    "fed", "Federal Reserve", "central bank policy", "GDP", 
-    "recession", "inflation report", "quantitative easing", 
-    "quarter", "fiscal quarter", "earnings report", 
-    "forecast", "valuation", "stock market", 
-    "bonds", "commodities", "exchange rates", "foreign exchange", 
-    "real estate",
-    "ESG", "sustainability"
-]
-
-keywords_fintech = [
-    "merge", "M&A", "acquisition", "acquire"
-]
+import time
+from contextlib import closing
+import article_store
+import search_index
+from keyword_matcher import compile_keywords
+from news_config import rss_feeds, keywords, keywords_fintech
+
 # Initialize session state to track selected outlet
 if 'selected_outlet' not in st.session_state:
     st.session_state.selected_outlet = None
-# Headers with Referer for Each Outlet
-headers_referer = {
-    "WSJ": "https://www.wsj.com/",
-    "BBC News": "http://bbci.co.uk/",
-    "FactSet": "http://factset.com/"
-}
-
-# Common Headers
-headers_template = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36',
-    'Accept-Language': 'en-US,en;q=0.9',
-}
 
 # Initialize session state to track the selected outlet
 if 'selected_outlet' not in st.session_state:
@@ -99,50 +40,6 @@ def apply_global_font(outlet_name):
     )
 
 
-# Fetch RSS feeds and merge them if necessary
-def fetch_and_merge_feeds(outlet_name, feed_urls):
-    headers = headers_template.copy()
-    headers['Referer'] = headers_referer.get(outlet_name, "")
-    merged_entries = []
-
-    # Fetch and parse each feed, and collect entries
-    for url in feed_urls:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            feed = feedparser.parse(response.content)
-            merged_entries.extend(feed.entries)
-        else:
-            st.error(f"Failed to load articles from {outlet_name}. (Status Code: {response.status_code})")
-
-    # Remove duplicate articles based on title
-    unique_entries = {}
-    for entry in merged_entries:
-        if entry.title not in unique_entries:
-            unique_entries[entry.title] = entry
-
-    return list(unique_entries.values())
-
-
-def parse_article(article):
-    """Extracts the title, subtitles, and rundowns from the article string."""
-    # Use regex to split by one or more consecutive newlines
-    sections = re.split(r'\n\s*\n', article.strip())
-    # Initialize a list to store subtitles and rundowns
-    stories = []
-
-    # Process the remaining sections in pairs (subtitle, rundown)
-    for i in range(0, len(sections)-1, 2):
-        subtitle = sections[i].strip()  # Extract subtitle
-        # Split the rundown by "Takeaway:" if it exists
-        rundown_parts = re.split(r'Takeaway:\s*', sections[i + 1].strip(), maxsplit=1)
-        rundown = rundown_parts[0].replace("The Rundown:", "").strip()  # Everything before "Takeaway:"
-        takeaway = rundown_parts[1].replace("Takeaway:", "").strip() if len(rundown_parts) > 1 else "No Takeaway Available"
-
-        # Store the parsed data in the stories list
-        stories.append((subtitle, rundown, takeaway))
-
-    return stories
-
 def cookie_string_to_dict(cookie_string):
     # Split the cookie string by '; ' to get individual key-value pairs
     cookies = cookie_string.split('; ')
@@ -159,55 +56,69 @@ def cookie_string_to_dict(cookie_string):
 def display_articles(outlet_name, feed_urls):
     st.title(f"{outlet_name}")
 
-    today = datetime.today()
-    start_date = today - timedelta(days=7)
-
+    # Everything here is read from the store; ingest_worker.py does the fetching and summarizing
     if outlet_name == "Fintech Radar":
         st.button("Back to Landing Page", on_click=reset_outlet)
-        with sync_playwright() as playwright:
-            issues = fetch_fintech_radar_articles(playwright)
-        for issue in issues:
-            # print(issue)
-            stories = parse_article(issue['summary'])
-            for subtitle, rundown, takeaway in stories:
+        with closing(article_store.connect()) as conn:
+            stories = article_store.outlet_stories(conn, outlet_name)
+        if not stories:
+            st.info(f"No {outlet_name} issues have been ingested yet. Start the worker with `python ingest_worker.py`.")
+        for story in stories:
+            subtitle, rundown, takeaway = story['title'], story['rundown'], story['takeaway']
             # Check if any keyword matches within the entire article content
-                if (any(keyword.lower() in rundown.lower() for keyword in keywords_fintech)) or (any(keyword.lower() in takeaway.lower() for keyword in keywords_fintech)):
-                    insights = small_summary(rundown+takeaway)
-                    st.markdown(
-                        f"""
-                        <div style="
-                            background-color: #ffffff;
-                            padding: 20px;
-                            margin-bottom: 15px;
-                            border-radius: 10px;
-                            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-                        ">
-                            <h3 style="color: #001f3f;">{issue['title']}</h3>
-                            <p style="font-style: italic; color: #555555;">{subtitle}</p>
-                            <p><strong>The Rundown:</strong> {rundown}</p>
-                            <p><strong>Takeaway:</strong> {takeaway}</p>
-                            <p><strong>Summary:</strong> {insights}</p>
-                            <a href="{issue['link']}" target="_blank" style="text-decoration: none; color: #1a73e8;">
-                            🔗 Read full issue
-                        </a>
-                        </div>
-                        """, unsafe_allow_html=True
-                    )
+            if compile_keywords(keywords_fintech).search(rundown, takeaway):
+                insights = story['summary'] or "Summary pending"
+                st.markdown(
+                    f"""
+                    <div style="
+                        background-color: #ffffff;
+                        padding: 20px;
+                        margin-bottom: 15px;
+                        border-radius: 10px;
+                        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
+                    ">
+                        <h3 style="color: #001f3f;">{story['issue_title']}</h3>
+                        <p style="font-style: italic; color: #555555;">{subtitle}</p>
+                        <p><strong>The Rundown:</strong> {rundown}</p>
+                        <p><strong>Takeaway:</strong> {takeaway}</p>
+                        <p><strong>Summary:</strong> {insights}</p>
+                        <a href="{story['issue_link']}" target="_blank" style="text-decoration: none; color: #1a73e8;">
+                        🔗 Read full issue
+                    </a>
+                    </div>
+                    """, unsafe_allow_html=True
+                )
 
     else:
         st.button("Back to Landing Page", on_click=reset_outlet)
-        articles = fetch_and_merge_feeds(outlet_name, feed_urls)
+        with closing(article_store.connect()) as conn:
+            # One indexed query for the last 7 days instead of filtering the raw feeds
+            articles = article_store.recent_articles(conn, outlet_name, days=7)
+            related = article_store.related_outlets(conn, articles)
+        if not articles:
+            st.info(f"No {outlet_name} articles have been ingested yet. Start the worker with `python ingest_worker.py`.")
         for entry in articles:
-            if any(keyword.lower() in (entry['title'] + entry['summary']).lower() for keyword in keywords):
-                # if start_date <= entry['published'] <= today:
+            if compile_keywords(keywords).search(entry['title'], entry['summary']):
                 # Display article details in Streamlit
-                st.subheader(entry.title)
-                st.write(f"**Summary:** {entry.summary}")
-                st.write(f"**Article Type:** {entry.get('wsj_articletype', 'N/A')}")
-                st.write(f"**Published Date:** {entry.published}")
-                st.write(f"**Link to Article:** {entry.link}")
+                st.subheader(entry['title'])
+                st.write(f"**Summary:** {entry['summary']}")
+                st.write(f"**Article Type:** {entry['article_type'] or 'N/A'}")
+                st.write(f"**Published Date:** {entry['published']}")
+                st.write(f"**Link to Article:** {entry['link']}")
+                if related.get(entry['id']):
+                    st.write(f"**Also reported by:** {', '.join(related[entry['id']])}")
     st.button("Back to All News", on_click=reset_outlet)
 
+def display_search_results(query):
+    start = time.perf_counter()
+    with closing(article_store.connect()) as conn:
+        results = search_index.search(conn, query, limit=20)
+    st.caption(f"{len(results)} results in {(time.perf_counter() - start) * 1000:.0f} ms")
+    for result in results:
+        st.markdown(f"**[{result['title']}]({result['link']})**  \n{result['outlet']} · {result['published'][:10]}")
+        if result['text']:
+            st.write(result['text'][:300])
+
 # Landing Page: Display buttons for each news outlet
 if st.session_state.selected_outlet is None:
     st.title("Hubby Tung's Special Newsletter")
@@ -217,6 +128,11 @@ if st.session_state.selected_outlet is None:
     for outlet_name in rss_feeds.keys():
         st.button(outlet_name, on_click=lambda o=outlet_name: st.session_state.__setitem__('selected_outlet', o))
 
+    # Search everything collected so far, not just what the feeds return today
+    query = st.text_input("Search past articles")
+    if query:
+        display_search_results(query)
+
 # Display articles for the selected outlet
 else:
     apply_global_font(st.session_state.selected_outlet)
@@ -1,17 +1,20 @@
 # app.py
 import streamlit as st
-import feedparser
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from fintechradar import fetch_fintech_radar_articles
-from llm import small_summary
-import requests
-import re 
-from playwright.sync_api import Playwright, sync_playwright, TimeoutError
+from llm import small_summary, model_id
+import model_registry
+from feed_fetcher import fetch_feeds
+from near_duplicates import dedupe
+from keyword_matcher import compile_keywords
+import logging
 import os
+import browser_pool
+import article_extractor
+import article_fetcher
 
-
-os.system("playwright install chromium")
+# Start loading the summary model now so the page doesn't wait for it
+model_registry.warm(model_id())
 
 # RSS Feeds for Different Outlets
 rss_feeds = {
@@ -100,14 +103,12 @@ def fetch_and_merge_feeds(outlet_name, feed_urls):
     headers['Referer'] = headers_referer.get(outlet_name, "")
     merged_entries = []
 
-    # Fetch and parse each feed, and collect entries
-    for url in feed_urls:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            feed = feedparser.parse(response.content)
-            merged_entries.extend(feed.entries)
+    # Fetch and parse all feeds concurrently; a failed feed doesn't block the others
+    for result in fetch_feeds(feed_urls, headers):
+        if result['error'] is None:
+            merged_entries.extend(result['entries'])
         else:
-            st.error(f"Failed to load articles from {outlet_name}. (Status Code: {response.status_code})")
+            st.error(f"Failed to load articles from {outlet_name}. ({result['error']})")
 
     # Remove duplicate articles based on title
     unique_entries = {}
@@ -115,28 +116,9 @@ def fetch_and_merge_feeds(outlet_name, feed_urls):
         if entry.title not in unique_entries:
             unique_entries[entry.title] = entry
 
-    return list(unique_entries.values())
-
-
-def parse_article(article):
-    """Extracts the title, subtitles, and rundowns from the article string."""
-    # Use regex to split by one or more consecutive newlines
-    sections = re.split(r'\n\s*\n', article.strip())
-    # Initialize a list to store subtitles and rundowns
-    stories = []
+    # Then drop re-titled and re-worded copies of the same story
+    return dedupe(list(unique_entries.values()), lambda entry: entry.title + ' ' + entry.get('summary', ''))
 
-    # Process the remaining sections in pairs (subtitle, rundown)
-    for i in range(0, len(sections)-1, 2):
-        subtitle = sections[i].strip()  # Extract subtitle
-        # Split the rundown by "Takeaway:" if it exists
-        rundown_parts = re.split(r'Takeaway:\s*', sections[i + 1].strip(), maxsplit=1)
-        rundown = rundown_parts[0].replace("The Rundown:", "").strip()  # Everything before "Takeaway:"
-        takeaway = rundown_parts[1].replace("Takeaway:", "").strip() if len(rundown_parts) > 1 else "No Takeaway Available"
-
-        # Store the parsed data in the stories list
-        stories.append((subtitle, rundown, takeaway))
-
-    return stories
 
 def cookie_string_to_dict(cookie_string):
     # Split the cookie string by '; ' to get individual key-value pairs
@@ -156,47 +138,53 @@ cookie_string = "DJSESSION=country%3Dus%7C%7Ccontinent%3Dna%7C%7Cregion%3D; ccpa
 # Convert the string to a dictionary
 cookies_dict = cookie_string_to_dict(cookie_string)
 
-def fetch_full_content(url, cookies_dict, headers):
-    with sync_playwright() as p:
-        # Launch Playwright browser in headless mode with proper flags
-        browser = p.chromium.launch(headless=False, args=["--no-sandbox"])
-
-        # Create a new browser context
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},  # Optional: Set viewport size
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36"
-        )
-
-        # Convert the cookies_dict into a format Playwright can use
-        cookies = [
-            {
-                "name": key,
-                "value": value,
-                "domain": "www.wsj.com",  # Replace with the correct domain
-                "path": "/",
-            }
-            for key, value in cookies_dict.items()
-        ]
-        # Add cookies to the context
-        context.add_cookies(cookies)
-
-        # Create a new page with custom headers
-        page = context.new_page()
-        page.set_extra_http_headers(headers)
-
-        # Navigate to the page and wait for it to load completely
-        page.goto(url, wait_until="domcontentloaded", timeout=120000)
+# WSJ pages are loaded in a pooled context carrying the subscriber cookies
+browser_pool.register_profile(
+    "wsj",
+    cookies=[
+        {
+            "name": key,
+            "value": value,
+            "domain": "www.wsj.com",
+            "path": "/",
+        }
+        for key, value in cookies_dict.items()
+    ],
+    viewport={"width": 1280, "height": 800},
+    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36",
+)
+
+# Paragraphs of an article body; once one has rendered the page is ready to read
+ARTICLE_BODY_SELECTOR = "article p, section p"
+# Set FETCH_DEBUG=1 to save a full-page screenshot of every fetched article
+FETCH_DEBUG = os.environ.get("FETCH_DEBUG") == "1"
+
+def load_full_content(page, url, headers, fast=True, debug=FETCH_DEBUG):
+    """Paragraph texts of an article page.
+
+    In fast mode images, fonts and other resources that don't carry text are never
+    downloaded, and the page is read as soon as the article body shows up and the network
+    settles (each capped at a few seconds) rather than after a fixed two-minute wait.
+    """
+    page.set_extra_http_headers(headers)
+    if fast:
+        browser_pool.block_resources(page)
+
+    # Navigate to the page and wait for it to load
+    page.goto(url, wait_until="domcontentloaded", timeout=120000)
+    if fast:
+        if not browser_pool.wait_until_ready(page, ARTICLE_BODY_SELECTOR):
+            logging.warning(f"No article body on {url} yet, reading the page as it is")
+    else:
         page.wait_for_timeout(120000)
+    if debug:
         page.screenshot(path="test_screenshot.png", full_page=True)
-        # Get the HTML content of the page
-        html = page.content()  # Full HTML content
-        # browser.close()
-
-        # Use BeautifulSoup to parse the content
-        soup = BeautifulSoup(html, 'html.parser')
-        paragraphs = [p.get_text().strip() for p in soup.find_all('p')]
+    # Get the HTML content of the page
+    html = page.content()  # Full HTML content
+    return article_extractor.extract_paragraphs(html, url)
 
-        return paragraphs
+def fetch_full_content(url, headers, fast=True, debug=FETCH_DEBUG):
+    return browser_pool.get_pool().submit(load_full_content, url, headers, fast, debug, profile="wsj").result()
     
 def display_articles(outlet_name, feed_urls):
     st.title(f"{outlet_name}")
@@ -205,14 +193,12 @@ def display_articles(outlet_name, feed_urls):
     start_date = today - timedelta(days=7)
 
     if outlet_name == "Fintech Radar":
-        with sync_playwright() as playwright:
-            issues = fetch_fintech_radar_articles(playwright)
+        issues = fetch_fintech_radar_articles()
         for issue in issues:
             # print(issue)
-            stories = parse_article(issue['summary'])
-            for subtitle, rundown, takeaway in stories:
+            for subtitle, rundown, takeaway in issue['stories']:
             # Check if any keyword matches within the entire article content
-                if (any(keyword.lower() in rundown.lower() for keyword in keywords_fintech)) or (any(keyword.lower() in takeaway.lower() for keyword in keywords_fintech)):
+                if compile_keywords(keywords_fintech).search(rundown, takeaway):
                     insights = small_summary(rundown+takeaway)
                     st.markdown(
                         f"""
@@ -237,44 +223,35 @@ def display_articles(outlet_name, feed_urls):
 
     else:
         articles = fetch_and_merge_feeds(outlet_name, feed_urls)
-        for entry in articles:
-            if any(keyword.lower() in (entry['title'] + entry['summary']).lower() for keyword in keywords):
-                # if start_date <= entry['published'] <= today:
-                 # Display article details in Streamlit
-                st.subheader(entry.title)
-                st.write(f"**Summary:** {entry.summary}")
-                st.write(f"**Article Type:** {entry.get('wsj_articletype', 'N/A')}")
-                st.write(f"**Link to Article:** {entry.link}")
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36',
-                    'Referer': 'https://www.wsj.com/',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                }
-                response = requests.get(entry.link, cookies=cookies_dict, headers=headers)
-                soup = BeautifulSoup(response.content, 'html.parser')
-                paragraphs = soup.find_all('p')
-                
-                st.write("**Full Article Content:**")
-                content = []
-                stop_keywords = ["Copyright", "All Rights Reserved"]  # End signals
-                skip_phrases = ["Advertisement", "Listen", "This copy is for", "www.djreprints.com"]  # Skip noise
-
-                for paragraph in paragraphs:
-                    text = paragraph.get_text().strip()
-                    # Stop processing if we reach the "Copyright" section
-                    if any(stop_word in text for stop_word in stop_keywords):
-                        break
-
-                    # Skip noisy or irrelevant paragraphs
-                    if any(skip_phrase in text for skip_phrase in skip_phrases):
-                        continue
-                    if len(text) < 10:  # Skip very short paragraphs (like timestamps)
-                        continue
-                    content.append(text)
+        matching = [entry for entry in articles if compile_keywords(keywords).search(entry['title'], entry['summary'])]
+        placeholders = []
+        for entry in matching:
+            # if start_date <= entry['published'] <= today:
+             # Display article details in Streamlit
+            st.subheader(entry.title)
+            st.write(f"**Summary:** {entry.summary}")
+            st.write(f"**Article Type:** {entry.get('wsj_articletype', 'N/A')}")
+            st.write(f"**Link to Article:** {entry.link}")
+            st.write("**Full Article Content:**")
+            # Filled in once the article's body has been fetched
+            placeholders.append(st.empty())
+            placeholders[-1].write("Loading...")
+
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36',
+            'Referer': 'https://www.wsj.com/',
+            'Accept-Language': 'en-US,en;q=0.9',
+        }
+        # Every body is fetched at once over pooled sessions, and each is shown as soon as it arrives
+        for i, result in article_fetcher.prefetch_articles([entry.link for entry in matching], headers, cookies_dict):
+            entry = matching[i]
+            with placeholders[i].container():
+                if result['error'] is not None:
+                    st.error(f"Failed to load the full article. ({result['error']})")
+                for text in result['paragraphs']:
                     st.write(text)
-                 # Optional: Fetch full article content using requests and BeautifulSoup
                 if st.button(f"Show Summary - {entry.title}"):
-                    content_str = '\n'.join(content)
+                    content_str = '\n'.join(result['paragraphs'])
                     summary = small_summary(content_str)
                     st.write(summary)
     st.button("Back to Landing Page", on_click=reset_outlet)
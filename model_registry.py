@@ -0,0 +1,54 @@
+import logging
+import threading
+
+# Models are loaded on first use and shared by everything in the process,
+# including every Streamlit session, since imported modules live for the whole server.
+_loaders = {}
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name, loader):
+    """Register how to load a model; nothing is loaded until it is first requested.
+
+    Registering a name again keeps the first loader, so scripts Streamlit reruns can register freely.
+    """
+    with _registry_lock:
+        _loaders.setdefault(name, loader)
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name):
+    """The process-wide instance of a registered model, loading it if needed."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    # One lock per model, so loading one never blocks callers of another
+    with _locks[name]:
+        if name not in _models:
+            logging.info(f"Loading model {name}")
+            _models[name] = _loaders[name]()
+        return _models[name]
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def warm(*names):
+    """Load models in a background thread so the first request finds them ready."""
+    pending = [name for name in names if name not in _models]
+    if not pending:
+        return None
+
+    def load():
+        for name in pending:
+            try:
+                get(name)
+            except Exception as e:
+                logging.error(f"Failed to warm model {name}: {e}")
+
+    thread = threading.Thread(target=load, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -1,8 +1,9 @@
 import streamlit as st
-import feedparser
 from datetime import datetime, timedelta
-import requests
 from bs4 import BeautifulSoup
+from feed_fetcher import fetch_feeds
+from near_duplicates import dedupe
+from keyword_matcher import compile_keywords
 
 # RSS Feeds for Different Outlets
 rss_feeds = {
@@ -63,14 +64,12 @@ def fetch_and_merge_feeds(outlet_name, feed_urls):
     headers['Referer'] = headers_referer.get(outlet_name, "")
     merged_entries = []
 
-    # Fetch and parse each feed, and collect entries
-    for url in feed_urls:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            feed = feedparser.parse(response.content)
-            merged_entries.extend(feed.entries)
+    # Fetch and parse all feeds concurrently; a failed feed doesn't block the others
+    for result in fetch_feeds(feed_urls, headers):
+        if result['error'] is None:
+            merged_entries.extend(result['entries'])
         else:
-            st.error(f"Failed to load articles from {outlet_name}. (Status Code: {response.status_code})")
+            st.error(f"Failed to load articles from {outlet_name}. ({result['error']})")
 
     # Remove duplicate articles based on title
     unique_entries = {}
@@ -78,7 +77,8 @@ def fetch_and_merge_feeds(outlet_name, feed_urls):
         if entry.title not in unique_entries:
             unique_entries[entry.title] = entry
 
-    return list(unique_entries.values())
+    # Then drop re-titled and re-worded copies of the same story
+    return dedupe(list(unique_entries.values()), lambda entry: entry.title + ' ' + entry.get('summary', ''))
 
 def apply_global_font(outlet_name):
     font_styles = {
@@ -117,7 +117,7 @@ def display_articles(outlet_name, feed_urls):
     # Loop through articles and display them
     for entry in articles:
         published_date = datetime(*entry.published_parsed[:6])
-        if any(keyword.lower() in (entry.title + entry.summary).lower() for keyword in keywords):
+        if compile_keywords(keywords).search(entry.title, entry.summary):
             if start_date <= published_date <= today:
                 st.markdown(
                     f"""
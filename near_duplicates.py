@@ -0,0 +1,107 @@
+import re
+import threading
+import zlib
+import numpy as np
+
+# 16 bands of 4 rows put the LSH threshold near a Jaccard similarity of (1/16) ** (1/4) = 0.5
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+# Estimated Jaccard similarity two items need to share a cluster
+THRESHOLD = 0.5
+SHINGLE_SIZE = 5
+# Items a clusterer remembers; past this the oldest are forgotten, so memory stays flat
+# in a long-running worker while recent stories still find their duplicates
+MAX_ITEMS = 20000
+
+# Universal hashing modulo a Mersenne prime; a * h stays below 2**63 for 32-bit h
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Character shingles of the normalized text, hashed to 32 bits."""
+    normalized = ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode("utf-8"))}
+    return {zlib.crc32(normalized[i:i + size].encode("utf-8")) for i in range(len(normalized) - size + 1)}
+
+
+class StoryClusterer:
+    """Groups near-duplicate texts with MinHash signatures and LSH banding.
+
+    Each added item is compared only with items sharing at least one band bucket,
+    so assigning a cluster costs a few dictionary lookups rather than a full scan.
+    Only the max_items most recently added items are kept to compare against.
+    """
+
+    def __init__(self, threshold=THRESHOLD, bands=NUM_BANDS, rows=ROWS_PER_BAND, seed=1, max_items=MAX_ITEMS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.max_items = max_items
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=bands * rows, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=bands * rows, dtype=np.int64)
+        self._buckets = [{} for _ in range(bands)]
+        # Insertion ordered, so the first key is the oldest
+        self._signatures = {}
+        self._cluster_of = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _forget_oldest(self):
+        key = next(iter(self._signatures))
+        signature = self._signatures.pop(key)
+        del self._cluster_of[key]
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band][band_key]
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signature(self, text):
+        hashes = np.fromiter(shingles(text), dtype=np.int64)
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def add(self, key, text):
+        """Add an item and return the key of its cluster's representative.
+
+        The first item of a cluster is its representative; adding a known key again
+        returns its existing cluster.
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+
+        with self._lock:
+            if key in self._cluster_of:
+                return self._cluster_of[key]
+
+            candidates = set()
+            for band, band_key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(band_key, ()))
+
+            best, best_similarity = None, self.threshold
+            for candidate in candidates:
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+
+            representative = key if best is None else self._cluster_of[best]
+            self._cluster_of[key] = representative
+            self._signatures[key] = signature
+            for band, band_key in enumerate(band_keys):
+                self._buckets[band].setdefault(band_key, []).append(key)
+            # Members of a forgotten representative's cluster still carry its key
+            while len(self._signatures) > self.max_items:
+                self._forget_oldest()
+            return representative
+
+
+def dedupe(items, text_of):
+    """Keep the first item of every near-duplicate cluster, preserving order."""
+    clusterer = StoryClusterer()
+    return [item for i, item in enumerate(items) if clusterer.add(i, text_of(item)) == i]
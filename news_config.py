@@ -0,0 +1,56 @@
+"""Outlets, feeds and filters shared by the Streamlit app and the ingestion worker."""
+
+# RSS Feeds for Different Outlets
+rss_feeds = {
+    "WSJ": [
+        "https://feeds.a.dj.com/rss/RSSMarketsMain.xml",
+        "https://feeds.a.dj.com/rss/WSJcomUSBusiness.xml",
+    ],
+    "BBC News": ["http://feeds.bbci.co.uk/news/rss.xml?edition=us"],
+    "FactSet": ["https://investor.factset.com/rss/news-releases.xml",
+                "https://investor.factset.com/rss/sec-filings.xml",
+                # "https://investor.factset.com/rss/events.xml"
+                ],
+}
+
+# Add Fintech Radar as a new option
+rss_feeds["Fintech Radar"] = None  # No RSS; handled differently
+
+# Keywords to filter articles
+keywords = [
+    "merge", "M&A", "acquisition", "takeover", "joint venture", 
+    "divestiture", "merger agreement", "IPO", "public offering", 
+    "capital raise", "supply chain", "manufacturing", 
+    "distribution", "operations", 
+    "finance", "funding", "investment", "private equity", 
+    "venture capital", "debt", "interest rates", "inflation", 
+    "monetary policy", "bank", "central bank", "credit", 
+    "lending",  "technology", "artificial intelligence", 
+    "AI", "cloud computing", "blockchain", 
+    "fintech", "semiconductor", "chip", "processor", "microchip", 
+    "Nvidia", "TSMC", "Intel", "ARM",
+    "fed", "Federal Reserve", "central bank policy", "GDP", 
+    "recession", "inflation report", "quantitative easing", 
+    "quarter", "fiscal quarter", "earnings report", 
+    "forecast", "valuation", "stock market", 
+    "bonds", "commodities", "exchange rates", "foreign exchange", 
+    "real estate",
+    "ESG", "sustainability"
+]
+
+keywords_fintech = [
+    "merge", "M&A", "acquisition", "acquire"
+]
+
+# Headers with Referer for Each Outlet
+headers_referer = {
+    "WSJ": "https://www.wsj.com/",
+    "BBC News": "http://bbci.co.uk/",
+    "FactSet": "http://factset.com/"
+}
+
+# Common Headers
+headers_template = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
@@ -0,0 +1,84 @@
+import os
+import re
+import threading
+import numpy as np
+
+# Exported transformers with int8 weights, one file per model, built on first use
+ONNX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "onnx")
+BATCH_SIZE = 32
+
+_export_lock = threading.Lock()
+
+
+def export_int8(model, path):
+    """Export a SentenceTransformer's transformer to ONNX, then quantize its weights to int8 at path."""
+    # Imported here so only the onnx backend needs torch.onnx and the quantization tools
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    transformer = model[0].auto_model.eval()
+    sample = model.tokenizer(["An example sentence.", "Another one."], padding=True, return_tensors="pt")
+    input_names = list(sample.keys())
+    # Write to temp files first so a concurrent loader never sees a half-written model
+    fp32_path = f"{path}.{os.getpid()}.{threading.get_ident()}.fp32.tmp"
+    int8_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer, tuple(sample[name] for name in input_names), fp32_path,
+                input_names=input_names, output_names=["token_embeddings"],
+                dynamic_axes={name: {0: "batch", 1: "tokens"} for name in input_names + ["token_embeddings"]},
+                opset_version=17, dynamo=False)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        os.replace(int8_path, path)
+    finally:
+        for tmp in (fp32_path, int8_path):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+class OnnxEncoder:
+    """A SentenceTransformer whose transformer runs in ONNX Runtime with int8 weights.
+
+    encode() takes the same sentences and gives the same embeddings as the model's own,
+    within quantization error: the tokenizer and the pooling modules after the
+    transformer are the model's.
+    """
+
+    def __init__(self, model_name, directory=ONNX_DIR):
+        import onnxruntime
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, device="cpu")
+        path = os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name) + "-int8.onnx")
+        with _export_lock:
+            if not os.path.exists(path):
+                os.makedirs(directory, exist_ok=True)
+                export_int8(model, path)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = [node.name for node in self._session.get_inputs()]
+        # Keep only what runs around the transformer, so its torch weights can be freed
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self._pooling = list(model)[1:]
+
+    def encode(self, sentences, batch_size=BATCH_SIZE, convert_to_numpy=True):
+        """Embeddings of a list of sentences as a float32 matrix; always numpy, like convert_to_numpy=True."""
+        import torch
+        # Longest first, as SentenceTransformer does, so each batch pads as little as possible
+        order = sorted(range(len(sentences)), key=lambda i: -len(sentences[i]))
+        embeddings = [None] * len(sentences)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            features = self.tokenizer([sentences[i] for i in batch], padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors="np")
+            token_embeddings = self._session.run(
+                None, {name: features[name].astype(np.int64) for name in self._input_names})[0]
+            features = {"token_embeddings": torch.from_numpy(token_embeddings),
+                        "attention_mask": torch.from_numpy(features["attention_mask"])}
+            with torch.no_grad():
+                for module in self._pooling:
+                    features = module(features)
+            for i, embedding in zip(batch, features["sentence_embedding"].numpy()):
+                embeddings[i] = embedding
+        return np.stack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+# Extracted page texts of each PDF, keyed by the SHA-256 of its bytes
+PDF_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "pdf_cache")
+# Pages one worker extracts per task; large enough that each task outweighs re-reading the document
+PAGES_PER_TASK = 8
+MAX_WORKERS = os.cpu_count() or 1
+# Documents kept in memory and on disk before the least recently used are dropped
+MEMORY_DOCUMENTS = 32
+DISK_DOCUMENTS = 500
+
+# Documents extracted in this process, so reruns of the same upload don't touch the disk either
+_pages = OrderedDict()
+_pages_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    """The process pool shared by every session, started on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned rather than forked, since the Streamlit server forking would copy its threads' locks
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def page_count(data):
+    from pdfminer.pdfpage import PDFPage
+    return sum(1 for _ in PDFPage.get_pages(BytesIO(data)))
+
+
+def extract_range(data, first, last):
+    """Texts of pages first..last-1, each ending in the form feed pdfminer puts after a page."""
+    # Imported here so the spawned workers and the page only load pdfminer when they extract
+    from pdfminer.high_level import extract_text
+    parts = extract_text(BytesIO(data), page_numbers=range(first, last)).split('\f')
+    return [(parts[i] if i < len(parts) else '') + '\f' for i in range(last - first)]
+
+
+def _cache_path(digest):
+    return os.path.join(PDF_CACHE_DIR, digest + ".json")
+
+
+def _remember(digest, pages):
+    with _pages_lock:
+        _pages[digest] = pages
+        _pages.move_to_end(digest)
+        if len(_pages) > MEMORY_DOCUMENTS:
+            _pages.popitem(last=False)
+
+
+def cached_pages(digest):
+    """Page texts of an already extracted PDF, or None."""
+    with _pages_lock:
+        pages = _pages.get(digest)
+        if pages is not None:
+            _pages.move_to_end(digest)
+            return pages
+    path = _cache_path(digest)
+    try:
+        with open(path, encoding="utf-8") as f:
+            pages = json.load(f)
+        # The file's modification time marks when it was last used, for evict_disk
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    _remember(digest, pages)
+    return pages
+
+
+def evict_disk(max_documents=DISK_DOCUMENTS):
+    """Delete all but the max_documents most recently used cached PDFs."""
+    try:
+        paths = [entry.path for entry in os.scandir(PDF_CACHE_DIR) if entry.name.endswith(".json")]
+        if len(paths) <= max_documents:
+            return
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[max_documents:]:
+            os.remove(path)
+    except OSError as e:
+        # Another process may be evicting at the same time
+        logging.error(f"Error while evicting cached PDFs: {e}")
+
+
+def store_pages(digest, pages):
+    _remember(digest, pages)
+    path = _cache_path(digest)
+    try:
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        # Write to a temp file first so a concurrent reader never sees a half-written cache entry
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(path + suffix, "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(path + suffix, path)
+    except OSError as e:
+        logging.error(f"Error while caching PDF {digest}: {e}")
+        return
+    evict_disk()
+
+
+def iter_pages(data):
+    """Yield (page index, page count, text) for each page of a PDF as its text becomes available.
+
+    Page ranges are extracted in parallel worker processes, so pages arrive out of order.
+    A PDF whose bytes were seen before is served from the cache without being parsed.
+    Closing the generator early, as a Streamlit rerun does, cancels the ranges not yet started.
+    """
+    digest = content_hash(data)
+    pages = cached_pages(digest)
+    if pages is None:
+        count = page_count(data)
+        pages = [None] * count
+        ranges = [(first, min(first + PAGES_PER_TASK, count)) for first in range(0, count, PAGES_PER_TASK)]
+        futures = {}
+        if len(ranges) <= 1:
+            # Not worth a trip to the pool
+            done = ((first, extract_range(data, first, last)) for first, last in ranges)
+        else:
+            futures = {_pool().submit(extract_range, data, first, last): first for first, last in ranges}
+            done = ((futures[future], future.result()) for future in as_completed(futures))
+        try:
+            for first, texts in done:
+                for i, text in enumerate(texts, first):
+                    pages[i] = text
+                    yield i, count, text
+        finally:
+            # No-op for ranges already done; frees the pool from an abandoned or failed extraction
+            for future in futures:
+                future.cancel()
+        store_pages(digest, pages)
+        return
+    for i, text in enumerate(pages):
+        yield i, len(pages), text
+
+
+def extract_text(data):
+    """The whole text of a PDF, as pdfminer's extract_text gives it."""
+    return ''.join(text for _, _, text in iter_pages(data))
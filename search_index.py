@@ -0,0 +1,284 @@
+import hashlib
+import heapq
+import logging
+import math
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import closing
+import article_store
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Replaced documents stay in the postings, and in df, until compact(); the worker compacts
+# once they reach this share of the live documents, which bounds how far idf drifts
+MAX_TOMBSTONE_RATIO = 0.1
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the their this to was were will with
+""".split())
+
+# Postings live next to the articles they index, one row per term:
+# data is a varint stream of (doc id gap, term frequency) pairs in doc id order.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    ref_id INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    live INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_search_docs_ref ON search_docs(kind, ref_id, live);
+
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL,
+    last_doc INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS search_stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# What gets indexed for each kind of document
+ARTICLE_DOCS = """
+SELECT a.id, a.title || ' ' || COALESCE(a.summary, '') || ' ' || COALESCE(a.full_text, '') AS text, d.digest
+FROM articles a
+LEFT JOIN search_docs d ON d.kind = 'article' AND d.ref_id = a.id AND d.live = 1
+"""
+STORY_DOCS = """
+SELECT s.id, s.title || ' ' || s.rundown || ' ' || s.takeaway AS text, d.digest
+FROM stories s
+LEFT JOIN search_docs d ON d.kind = 'story' AND d.ref_id = s.id AND d.live = 1
+"""
+# Live documents whose article or story was deleted, e.g. the stories an issue no longer has
+REMOVED_DOCS = """
+SELECT d.id, d.length FROM search_docs d
+LEFT JOIN articles a ON d.kind = 'article' AND a.id = d.ref_id
+LEFT JOIN stories s ON d.kind = 'story' AND s.id = d.ref_id
+WHERE d.live = 1 AND a.id IS NULL AND s.id IS NULL
+"""
+
+
+def tokenize(text):
+    return [token for token in re.findall(r"[a-z0-9]+(?:[&'][a-z0-9]+)*", text.lower()) if token not in STOPWORDS]
+
+
+def encode_postings(pairs):
+    """Varint-encode (gap, tf) pairs."""
+    out = bytearray()
+    for value in (v for pair in pairs for v in pair):
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_postings(data):
+    """Yield (doc_id, tf) from a varint postings blob."""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    doc_id = 0
+    for i in range(0, len(values), 2):
+        doc_id += values[i]
+        yield doc_id, values[i + 1]
+
+
+def _ensure_schema(conn):
+    conn.executescript(SCHEMA)
+
+
+def _stat(conn, key):
+    row = conn.execute("SELECT value FROM search_stats WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def _add_stat(conn, key, delta):
+    conn.execute(
+        "INSERT INTO search_stats (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+        (key, delta),
+    )
+
+
+def _tombstone(conn, doc_id, length):
+    conn.execute("UPDATE search_docs SET live = 0 WHERE id = ?", (doc_id,))
+    _add_stat(conn, 'doc_count', -1)
+    _add_stat(conn, 'total_length', -length)
+
+
+def _add_document(conn, kind, ref_id, text, digest, new_postings):
+    """Register one document inside an open write transaction and collect its postings."""
+    # A changed document is re-added under a new id; the old one becomes a tombstone
+    old = conn.execute("SELECT id, length FROM search_docs WHERE kind = ? AND ref_id = ? AND live = 1",
+                       (kind, ref_id)).fetchone()
+    if old is not None:
+        _tombstone(conn, *old)
+
+    terms = Counter(tokenize(text))
+    length = sum(terms.values())
+    doc_id = conn.execute("INSERT INTO search_docs (kind, ref_id, length, digest) VALUES (?, ?, ?, ?)",
+                          (kind, ref_id, length, digest)).lastrowid
+    _add_stat(conn, 'doc_count', 1)
+    _add_stat(conn, 'total_length', length)
+    for term, tf in terms.items():
+        new_postings[term].append((doc_id, tf))
+
+
+def _append_postings(conn, new_postings):
+    """Append gap-encoded postings; doc ids only grow, so existing bytes never change."""
+    for term, pairs in new_postings.items():
+        row = conn.execute("SELECT df, last_doc, data FROM search_postings WHERE term = ?", (term,)).fetchone()
+        df, last_doc, data = row if row is not None else (0, 0, b'')
+        gaps = [(doc_id - prev, tf) for (doc_id, tf), prev in zip(pairs, [last_doc] + [d for d, _ in pairs])]
+        conn.execute(
+            "INSERT OR REPLACE INTO search_postings (term, df, last_doc, data) VALUES (?, ?, ?, ?)",
+            (term, df + len(pairs), pairs[-1][0], data + encode_postings(gaps)),
+        )
+
+
+def index_pending(conn):
+    """Index articles and stories that are new or changed since they were last indexed.
+
+    Documents of deleted articles and stories become tombstones, like replaced ones.
+    """
+    _ensure_schema(conn)
+    new_postings = defaultdict(list)
+    added = 0
+    # Take the write lock up front so concurrent indexers can't interleave postings appends
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for doc_id, length in conn.execute(REMOVED_DOCS).fetchall():
+            _tombstone(conn, doc_id, length)
+        for kind, query in (('article', ARTICLE_DOCS), ('story', STORY_DOCS)):
+            for ref_id, text, indexed_digest in conn.execute(query).fetchall():
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                if digest != indexed_digest:
+                    _add_document(conn, kind, ref_id, text, digest, new_postings)
+                    added += 1
+        _append_postings(conn, new_postings)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return added
+
+
+def _doc_lengths(conn, doc_ids):
+    lengths = {}
+    doc_ids = list(doc_ids)
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(doc_ids), 900):
+        chunk = doc_ids[i:i + 900]
+        lengths.update(conn.execute(
+            f"SELECT id, length FROM search_docs WHERE live = 1 AND id IN ({','.join('?' * len(chunk))})", chunk))
+    return lengths
+
+
+def _hydrate(conn, kind, ref_id):
+    if kind == 'article':
+        return conn.execute(
+            """
+            SELECT a.title, a.link, a.summary AS text, a.published, o.name AS outlet
+            FROM articles a JOIN outlets o ON o.id = a.outlet_id WHERE a.id = ?
+            """, (ref_id,)).fetchone()
+    return conn.execute(
+        """
+        SELECT s.title, a.link, s.rundown AS text, a.published, o.name AS outlet
+        FROM stories s JOIN articles a ON a.id = s.article_id JOIN outlets o ON o.id = a.outlet_id
+        WHERE s.id = ?
+        """, (ref_id,)).fetchone()
+
+
+def search(conn, query, limit=20):
+    """Rank indexed articles and stories against a query with BM25, best first."""
+    _ensure_schema(conn)
+    terms = set(tokenize(query))
+    doc_count = _stat(conn, 'doc_count')
+    if not terms or not doc_count:
+        return []
+    avg_length = _stat(conn, 'total_length') / doc_count
+
+    postings = conn.execute(
+        f"SELECT df, data FROM search_postings WHERE term IN ({','.join('?' * len(terms))})", list(terms)).fetchall()
+    matches = defaultdict(list)
+    for df, data in postings:
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        for doc_id, tf in decode_postings(data):
+            matches[doc_id].append((idf, tf))
+
+    # Tombstoned documents have no live length and drop out here
+    lengths = _doc_lengths(conn, matches)
+    scores = {}
+    for doc_id, length in lengths.items():
+        norm = K1 * (1 - B + B * length / avg_length)
+        scores[doc_id] = sum(idf * tf * (K1 + 1) / (tf + norm) for idf, tf in matches[doc_id])
+
+    results = []
+    for doc_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+        kind, ref_id = conn.execute("SELECT kind, ref_id FROM search_docs WHERE id = ?", (doc_id,)).fetchone()
+        row = _hydrate(conn, kind, ref_id)
+        if row is not None:
+            results.append(dict(row, kind=kind, score=score))
+    return results
+
+
+def compact(conn):
+    """Rewrite every posting list without tombstoned documents."""
+    _ensure_schema(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        live = {row[0] for row in conn.execute("SELECT id FROM search_docs WHERE live = 1")}
+        for term, data in conn.execute("SELECT term, data FROM search_postings").fetchall():
+            kept = [(doc_id, tf) for doc_id, tf in decode_postings(data) if doc_id in live]
+            if not kept:
+                conn.execute("DELETE FROM search_postings WHERE term = ?", (term,))
+                continue
+            gaps = [(doc_id - prev, tf) for (doc_id, tf), prev in zip(kept, [0] + [d for d, _ in kept])]
+            conn.execute("UPDATE search_postings SET df = ?, last_doc = ?, data = ? WHERE term = ?",
+                         (len(kept), kept[-1][0], encode_postings(gaps), term))
+        conn.execute("DELETE FROM search_docs WHERE live = 0")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def compact_if_needed(conn, max_ratio=MAX_TOMBSTONE_RATIO):
+    """compact() once tombstones make up more than max_ratio of the live documents; True if it ran."""
+    _ensure_schema(conn)
+    tombstones = conn.execute("SELECT COUNT(*) FROM search_docs WHERE live = 0").fetchone()[0]
+    if not tombstones or tombstones <= max_ratio * _stat(conn, 'doc_count'):
+        return False
+    compact(conn)
+    logging.info(f"Compacted the search index, dropping {tombstones} replaced documents.")
+    return True
+
+
+def main():
+    """Index new content, then search: python search_index.py [--compact] <query>"""
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+
+    with closing(article_store.connect()) as conn:
+        logging.info(f"Indexed {index_pending(conn)} new or changed documents.")
+        if args and args[0] == "--compact":
+            compact(conn)
+            args = args[1:]
+        for result in search(conn, ' '.join(args)):
+            print(f"{result['score']:.2f}  [{result['outlet']}] {result['title']}  {result['link']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
+import torch
 from sentence_transformers import SentenceTransformer, util
+from embedding_cache import cached_encode
+import model_registry
 
-# Load the model (MiniLM)
-model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
+# The model (MiniLM) is loaded on first use
+MODEL_NAME = 'paraphrase-MiniLM-L6-v2'
+model_registry.register(MODEL_NAME, lambda: SentenceTransformer(MODEL_NAME))
 
 def extractive_summary(article, top_n=2):
     # Split the article into sentences
     sentences = article.split('. ')
     
-    # Encode all sentences into embeddings
-    sentence_embeddings = model.encode(sentences, convert_to_tensor=True)
+    # Encode all sentences into embeddings, reusing cached ones
+    sentence_embeddings = torch.from_numpy(cached_encode(MODEL_NAME, sentences))
     
     # Calculate the mean embedding (to represent the entire article)
     article_embedding = sentence_embeddings.mean(dim=0)
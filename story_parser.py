@@ -0,0 +1,229 @@
+import bisect
+import functools
+import re
+from collections import namedtuple
+
+# Structured stories of a cleaned Fintech Radar issue, found in one walk over its section
+# markers. Each story's heading is the last sentence with a comma before a "The Rundown:"
+# (after "Find Out More" or the previous "Takeaway:"); headings are paired with rundowns in
+# the order the layout has always used, so laying an issue out from its stories gives the
+# same text as the replace-based insert_story_titles did (see bench_stories.py). That order
+# is off where an issue's first headings come before any marker; issue_stories pairs the
+# (heading, rundown, takeaway) records by order in the text instead, from the same walk.
+
+# heading: the "Name, Source" line; title and source: its two halves.
+# heading_span: (start, end) of the heading in the cleaned issue, removed when it is laid out.
+# rundown_span: (start, end) of "The Rundown:" up to its "Takeaway:", or None for a heading
+# without a rundown to go above; rundown and takeaway are then None too.
+Story = namedtuple("Story", "heading title source rundown takeaway heading_span rundown_span")
+
+_MARKERS = re.compile(r'Find Out More|Takeaway:|The Rundown:')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+_TAKEAWAY_SPLIT = re.compile(r'Takeaway:\s*')
+_SECTION_BREAK = re.compile(r'\n\s*\n')
+_RUNDOWN = "The Rundown:"
+_FOOTER = "Show Some Love"
+
+
+def _heading(content, start, end):
+    """The last sentence with a comma in content[start:end], or None.
+
+    Sentences end at [.!?] followed by whitespace; only the one around the last comma is looked for.
+    """
+    section = content[start:end].strip()
+    comma = section.rfind(',')
+    if comma == -1:
+        return None
+    stop = _SENTENCE_BREAK.search(section, comma)
+    begin = comma
+    while begin != -1:
+        begin = max(section.rfind('.', 0, begin), section.rfind('!', 0, begin), section.rfind('?', 0, begin))
+        if begin != -1 and section[begin + 1].isspace():
+            break
+    return section[begin + 1:stop.start() if stop else len(section)].strip()
+
+
+def _excise(content, start, end, spans):
+    """content[start:end] without the parts covered by spans, which are sorted and disjoint."""
+    pieces = []
+    for span_start, span_end in spans:
+        if span_end <= start or span_start >= end:
+            continue
+        pieces.append(content[start:max(start, span_start)])
+        start = max(start, span_end)
+    pieces.append(content[start:end])
+    return ''.join(pieces)
+
+
+def section_story(heading, section):
+    """(heading, rundown, takeaway) of a "The Rundown: ... Takeaway: ..." section."""
+    rundown_parts = _TAKEAWAY_SPLIT.split(section.strip(), maxsplit=1)
+    rundown = rundown_parts[0].replace("The Rundown:", "").strip()
+    takeaway = rundown_parts[1].replace("Takeaway:", "").strip() if len(rundown_parts) > 1 else "No Takeaway Available"
+    return heading, rundown, takeaway
+
+
+@functools.lru_cache(maxsize=32)
+def _walk(content):
+    """Heading and rundown spans of content, in one pass over its markers.
+
+    Returns (after_more, after_takeaway, rundowns, markers): heading sections opened by
+    "Find Out More" and by "Takeaway:", each a (start, end) closed by the next "The Rundown:",
+    the rundowns, each from "The Rundown:" to the next "Takeaway:" or the end of the issue,
+    and the (starts, ends) of every marker. Cached, so parse_issue and issue_stories share it.
+    """
+    after_more, after_takeaway, rundowns = [], [], []
+    # Markers don't overlap, so both lists are sorted
+    marker_starts, marker_ends = [], []
+    more_at = takeaway_at = rundown_at = None
+    for match in _MARKERS.finditer(content):
+        marker_starts.append(match.start())
+        marker_ends.append(match.end())
+        marker = match.group()
+        if marker == _RUNDOWN:
+            if more_at is not None:
+                after_more.append((more_at, match.start()))
+                more_at = None
+            if takeaway_at is not None:
+                after_takeaway.append((takeaway_at, match.start()))
+                takeaway_at = None
+            if rundown_at is None:
+                rundown_at = match.start()
+        elif marker == "Takeaway:":
+            if rundown_at is not None:
+                rundowns.append((rundown_at, match.start()))
+                rundown_at = None
+            if takeaway_at is None:
+                takeaway_at = match.end()
+        elif more_at is None:
+            more_at = match.end()
+    if rundown_at is not None:
+        # An unfinished rundown runs to the end, short of a trailing newline
+        rundowns.append((rundown_at, len(content) - 1 if content.endswith('\n') else len(content)))
+    return after_more, after_takeaway, rundowns, (marker_starts, marker_ends)
+
+
+def _heading_spans(content, headings):
+    """Where each heading is removed from: its first occurrence not already removed."""
+    spans = []
+    for heading in headings:
+        start = content.find(heading)
+        while start != -1 and any(span and start < span[1] and start + len(heading) > span[0] for span in spans):
+            start = content.find(heading, start + 1)
+        spans.append((start, start + len(heading)) if start != -1 else None)
+    return spans
+
+
+@functools.lru_cache(maxsize=32)
+def parse_issue(content):
+    """The stories of a cleaned issue, as a tuple of Story records."""
+    after_more, after_takeaway, rundowns, _ = _walk(content)
+    headings = [heading for heading in (_heading(content, start, end) for start, end in after_more + after_takeaway)
+                if heading is not None]
+    heading_spans = _heading_spans(content, headings)
+    removed = sorted(span for span in heading_spans if span is not None)
+
+    # Paired rundowns get their heading laid out above them; a story's section runs to the next one
+    paired = rundowns[:len(headings)]
+    footer = content.find(_FOOTER, paired[0][0]) if paired else -1
+    boundaries = [start for start, _ in paired[1:]] + [len(content)]
+
+    stories = []
+    for i, (heading, heading_span) in enumerate(zip(headings, heading_spans)):
+        title, _, source = heading.rpartition(',')
+        rundown = takeaway = rundown_span = None
+        # A rundown that lost part of itself to a removed heading has nothing to be laid out above
+        if i < len(paired) and not any(start < paired[i][1] and end > paired[i][0] for start, end in removed):
+            rundown_span = paired[i]
+            # Stories past the footer are laid out but cut off with it
+            if footer == -1 or footer > rundown_span[0]:
+                end = boundaries[i] if footer == -1 else min(boundaries[i], footer)
+                section = _SECTION_BREAK.split(_excise(content, rundown_span[0], end, removed), maxsplit=1)[0]
+                _, rundown, takeaway = section_story(heading, section)
+        stories.append(Story(heading, title.strip(), source.strip(), rundown, takeaway, heading_span, rundown_span))
+    return tuple(stories)
+
+
+def _is_heading(sentence):
+    """A "Title, Source" heading ends with its source, not with the punctuation prose ends with."""
+    return sentence is not None and ',' in sentence and not sentence.endswith(('.', '!', '?', ':', ';'))
+
+
+def _gap_headings(content, start, end, max_lines):
+    """Headings on the last max_lines lines of content[start:end], in order, as (position, heading)."""
+    found = []
+    lines = content[start:end].rstrip().split('\n')
+    line_end = start + len(content[start:end].rstrip())
+    for line in reversed(lines[-max_lines:]):
+        line_start = line_end - len(line)
+        heading = _heading(content, line_start, line_end)
+        if not _is_heading(heading):
+            break
+        found.append((content.rfind(heading, line_start, line_end), heading))
+        line_end = line_start - 1
+    return found[::-1]
+
+
+@functools.lru_cache(maxsize=32)
+def issue_stories(content):
+    """(heading, rundown, takeaway) of each story of a cleaned issue, paired by order in the text.
+
+    Issues list a story's "Name, Source" heading before its rundown, but some put two headings
+    before the first rundown and the rest one story late. Taking every heading in order,
+    including those before the first rundown, keeps heading n with rundown n either way.
+    A rundown left without a heading gets no record.
+    """
+    _, _, rundowns, (marker_starts, marker_ends) = _walk(content)
+    headings, heading_starts = [], []
+    for i, (rundown_start, _) in enumerate(rundowns):
+        before = bisect.bisect_right(marker_ends, rundown_start)
+        gap_start = marker_ends[before - 1] if before else 0
+        # Only the first rundown has headings stacked on lines above it; elsewhere those lines are takeaway
+        gap_headings = _gap_headings(content, gap_start, rundown_start, len(content) if i == 0 else 1)
+        # Where the text before this rundown stops being the previous story's takeaway
+        heading_starts.append(gap_headings[0][0] if gap_headings else rundown_start)
+        for _, heading in gap_headings:
+            # Some issues repeat the heading of the story they open with
+            if not headings or heading != headings[-1]:
+                headings.append(heading)
+
+    footer = content.find(_FOOTER, rundowns[0][0]) if rundowns else -1
+    stories = []
+    for i, (heading, (rundown_start, takeaway_at)) in enumerate(zip(headings, rundowns)):
+        if footer != -1 and footer < rundown_start:
+            break
+        # The takeaway runs to the next marker, the next story's heading or the footer
+        after = bisect.bisect_right(marker_starts, takeaway_at)
+        end = min(marker_starts[after:after + 1] + heading_starts[i + 1:i + 2]
+                  + ([footer] if footer > takeaway_at else []) + [len(content)])
+        section = _SECTION_BREAK.split(content[rundown_start:end], maxsplit=1)[0]
+        stories.append(section_story(heading, section))
+    return tuple(stories)
+
+
+def layout(content, stories):
+    """content with each story's heading moved onto its own line above its rundown.
+
+    Built in one pass from the stories' spans instead of a replace per heading.
+    """
+    edits = [(span[0], span[1], '') for span in (story.heading_span for story in stories) if span is not None]
+    edits += [(story.rundown_span[0], story.rundown_span[0], f'\n{story.heading}\n\n')
+              for story in stories if story.rundown_span is not None]
+    # Insertions sort before a removal starting at the same offset, as they never overlap it
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    pieces = []
+    position = 0
+    for start, end, text in edits:
+        pieces.append(content[position:start])
+        pieces.append(text)
+        position = end
+    pieces.append(content[position:])
+    return ''.join(pieces)
+
+
+def parse_article(article):
+    """Extracts the subtitles, rundowns and takeaways from an issue that has been laid out."""
+    # Use regex to split by one or more consecutive newlines
+    sections = _SECTION_BREAK.split(article.strip())
+    # Process the sections in pairs (subtitle, rundown)
+    return [section_story(sections[i].strip(), sections[i + 1]) for i in range(0, len(sections) - 1, 2)]
@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime, timezone
+import lxml.html
+import requests
+from http_pool import parallel_map, pooled_session
+
+# Upper bound on simultaneous post downloads
+MAX_WORKERS = 8
+# Seconds to wait for a single request before giving up on it
+DEFAULT_TIMEOUT = 15
+# Posts per archive request; Substack serves at most this many per page
+ARCHIVE_PAGE_SIZE = 12
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Elements rendered on their own lines, matching what a browser's innerText gives for the post body
+BLOCK_TAGS = frozenset("""
+address article aside blockquote br dd div dl dt figcaption figure footer h1 h2 h3 h4 h5 h6 header hr
+li main nav ol p pre section table tbody td th thead tr ul
+""".split())
+SKIPPED_TAGS = frozenset(["script", "style", "noscript", "button", "svg"])
+
+# One pooled session so every post request reuses the connection to the publication
+session = pooled_session(MAX_WORKERS, HEADERS)
+
+
+def _inner_text(element, parts):
+    if element.tag in SKIPPED_TAGS or not isinstance(element.tag, str):
+        return
+    block = element.tag in BLOCK_TAGS
+    if block:
+        parts.append('\n')
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        _inner_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+    if block:
+        parts.append('\n')
+
+
+def inner_text(element):
+    """Approximate innerText: block elements on their own lines, runs of whitespace collapsed."""
+    parts = []
+    _inner_text(element, parts)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def body_text(body_html):
+    """Text of a post body as served by the posts endpoint."""
+    return inner_text(lxml.html.fragment_fromstring(body_html, create_parent="div"))
+
+
+def page_text(html):
+    """Title and text of the div.body.markup of a server-rendered post page."""
+    tree = lxml.html.fromstring(html)
+    bodies = tree.find_class("markup")
+    text = '\n'.join(inner_text(body) for body in bodies if "body" in body.classes)
+    title = tree.findtext(".//title")
+    return (title or '').strip(), text
+
+
+def _published(post_date):
+    if not post_date:
+        return None
+    published = datetime.fromisoformat(post_date.replace("Z", "+00:00")).astimezone(timezone.utc)
+    return published.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _slug(link):
+    path = link.split("?", 1)[0].rstrip("/")
+    return path.rsplit("/p/", 1)[1] if "/p/" in path else None
+
+
+def archive_page(base_url, offset=0, limit=ARCHIVE_PAGE_SIZE, timeout=DEFAULT_TIMEOUT):
+    """One page of the publication's archive, newest first, as post dicts (link, slug, title, published)."""
+    response = session.get(f"{base_url}/api/v1/archive", params={"sort": "new", "offset": offset, "limit": limit},
+                           timeout=timeout)
+    response.raise_for_status()
+    return [
+        {
+            'link': post['canonical_url'],
+            'slug': post.get('slug'),
+            'title': post.get('title'),
+            'published': _published(post.get('post_date')),
+        }
+        for post in response.json()
+    ]
+
+
+def fetch_post(base_url, post, timeout=DEFAULT_TIMEOUT):
+    """Fetch one post over HTTP, or return None when neither endpoint has its content.
+
+    Tries the posts endpoint first, then the post page itself; the result's 'fetched_via'
+    says which one served it.
+    """
+    link = post['link']
+    slug = post.get('slug') or _slug(link)
+    if slug:
+        try:
+            response = session.get(f"{base_url}/api/v1/posts/{slug}", timeout=timeout)
+            if response.status_code == 200:
+                data = response.json()
+                text = body_text(data['body_html']) if data.get('body_html') else ''
+                if text:
+                    return {
+                        'title': data.get('title') or post.get('title'),
+                        'summary': text,
+                        'link': link,
+                        'published': _published(data.get('post_date')) or post.get('published'),
+                        'fetched_via': 'api',
+                    }
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Error while fetching post {slug} from the API: {e}")
+
+    try:
+        response = session.get(link, timeout=timeout)
+        if response.status_code == 200:
+            title, text = page_text(response.content)
+            if text:
+                return {
+                    'title': title or post.get('title'),
+                    'summary': text,
+                    'link': link,
+                    'published': post.get('published'),
+                    'fetched_via': 'html',
+                }
+    except (requests.RequestException, ValueError) as e:
+        logging.error(f"Error while fetching post page {link}: {e}")
+    return None
+
+
+def fetch_posts(base_url, posts, timeout=DEFAULT_TIMEOUT):
+    """Fetch posts in parallel. Results keep the order of posts, with None for ones HTTP couldn't serve."""
+    return parallel_map(lambda post: fetch_post(base_url, post, timeout), posts, MAX_WORKERS)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Summaries keyed by what they are a pure function of, shared by every session and process on the host
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "summaries.db")
+# Entries kept before the least recently used are evicted
+MAX_ENTRIES = 50000
+# Eviction runs every this many new entries rather than on every write
+EVICT_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used);
+"""
+
+_local = threading.local()
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+def _connection():
+    """One connection per thread, since Streamlit serves each session from its own thread."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        # WAL lets sessions read while another process is writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def summary_key(content, top_n, model_id):
+    return hashlib.sha256(f"{model_id}\0{top_n}\0{content}".encode("utf-8")).hexdigest()
+
+
+def get_many(keys):
+    """Cached summaries for the keys that have one, marking them as recently used."""
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    conn = _connection()
+    found = {}
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(keys), 900):
+        chunk = keys[i:i + 900]
+        found.update(conn.execute(
+            f"SELECT key, summary FROM summaries WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+    if found:
+        with conn:
+            conn.executemany("UPDATE summaries SET last_used = ? WHERE key = ?",
+                             [(time.time(), key) for key in found])
+    return found
+
+
+def put_many(summaries):
+    """Store {key: summary} and evict the least recently used entries once the cache is full."""
+    global _writes
+    if not summaries:
+        return
+    conn = _connection()
+    now = time.time()
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO summaries (key, summary, last_used) VALUES (?, ?, ?)",
+                         [(key, summary, now) for key, summary in summaries.items()])
+    with _writes_lock:
+        _writes += len(summaries)
+        evict = _writes >= EVICT_EVERY
+        if evict:
+            _writes = 0
+    if evict:
+        evict_lru(conn)
+
+
+def evict_lru(conn=None, max_entries=MAX_ENTRIES):
+    conn = conn or _connection()
+    with conn:
+        conn.execute(
+            """
+            DELETE FROM summaries WHERE key IN (
+                SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """, (max_entries,))